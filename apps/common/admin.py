@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import TaskOutboxMessage
+
+
+@admin.register(TaskOutboxMessage)
+class TaskOutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ["task_name", "created_at", "published_at", "attempts"]
+    list_filter = ["task_name", "published_at"]
+    readonly_fields = ["task_name", "args", "kwargs", "created_at", "published_at", "attempts", "last_error"]
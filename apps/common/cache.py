@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def _generation_key(scope):
+    return f"cache_generation:{scope}"
+
+
+def _fresh_generation():
+    # Clock based so a generation lost to eviction is never handed out again
+    return time.time_ns()
+
+
+def get_generations(*scopes):
+    """
+    Current generation number of each scope, in order.
+
+    Cached values are stored under keys that embed these numbers, so bumping
+    a scope makes every key built from it unreachable without deleting
+    anything and without needing pattern deletes on the backend.
+    """
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: _fresh_generation() for key in keys if key not in found}
+    for key, value in missing.items():
+        # add() keeps a generation another process initialised first
+        if not cache.add(key, value, timeout=None):
+            value = cache.get(key, value)
+        found[key] = value
+    return [found[key] for key in keys]
+
+
+def bump_generation(*scopes):
+    """Invalidate everything cached under ``scopes``; O(1) per scope."""
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_generation(), timeout=None)
+    logger.info(f"Cache generation bumped - Scopes: {', '.join(scopes)}")
+
+
+def versioned_cache_key(prefix, scopes, *parts):
+    """Build ``prefix`` + the generations of ``scopes`` + ``parts`` into one key."""
+    generations = ".".join(str(generation) for generation in get_generations(*scopes))
+    return ":".join([prefix, generations, *[str(part) for part in parts]])
+
+
+# Request cache keys
+
+TRACKED_CACHES = []
+
+
+def track_cache(name):
+    """Register a cached view's key prefix so ``cache_stats`` reports it."""
+    if name not in TRACKED_CACHES:
+        TRACKED_CACHES.append(name)
+    return name
+
+
+def canonical_query_string(query_params):
+    """``query_params`` with keys and repeated values sorted, so equivalent URLs match."""
+    return urlencode(sorted((key, value) for key in query_params for value in query_params.getlist(key)))
+
+
+def request_audience(request):
+    """
+    Who a cached response may be shared with: every staff member sees the
+    same data, anybody else only their own.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return "anon"
+    return "staff" if user.is_staff else f"user:{user.pk}"
+
+
+def request_cache_key(prefix, request, scopes=()):
+    """
+    Key for a cached response, identical in every process for equivalent
+    requests: ``prefix``, API version, the generations of ``scopes``, the
+    audience and a SHA-256 digest of host, path and the canonical query
+    string (absolute pagination links depend on the host).
+    """
+    version = getattr(request, "version", None) or settings.API_VERSION
+    resource = "\n".join([request.get_host(), request.path, canonical_query_string(request.query_params)])
+    digest = hashlib.sha256(resource.encode()).hexdigest()[:32]
+    return versioned_cache_key(prefix, scopes, version, request_audience(request), digest)
+
+
+# Hit/miss counters
+
+
+def _stats_key(name, outcome):
+    return f"cache_stats:{name}:{outcome}"
+
+
+def record_cache_access(name, hit):
+    if not settings.CACHE_STATS_ENABLED:
+        return
+    key = _stats_key(name, "hits" if hit else "misses")
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+async def arecord_cache_access(name, hit):
+    """``record_cache_access`` for async views."""
+    if not settings.CACHE_STATS_ENABLED:
+        return
+    key = _stats_key(name, "hits" if hit else "misses")
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+def cache_stats(*names):
+    """``{name: {"hits": n, "misses": n}}`` for ``names`` (default: every tracked cache)."""
+    names = names or TRACKED_CACHES
+    keys = {_stats_key(name, outcome): (name, outcome) for name in names for outcome in ("hits", "misses")}
+    found = cache.get_many(list(keys))
+    stats = {name: {"hits": 0, "misses": 0} for name in names}
+    for key, (name, outcome) in keys.items():
+        stats[name][outcome] = found.get(key, 0)
+    return stats
+
+
+def reset_cache_stats(*names):
+    names = names or TRACKED_CACHES
+    cache.delete_many([_stats_key(name, outcome) for name in names for outcome in ("hits", "misses")])
+
+
+# Stampede protection
+#
+# Values are stored in an envelope recording how long they took to compute and
+# when they go stale. Readers refresh probabilistically ahead of that moment
+# (the earlier the more expensive the value), only the holder of a short lock
+# recomputes, and everybody else keeps being served the previous value until
+# the new one lands, so an expiring hot key costs one recomputation instead of
+# one per concurrent request.
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _envelope(value, delta, timeout):
+    return {"value": value, "delta": delta, "expires": time.time() + timeout}
+
+
+def _should_refresh(envelope, beta):
+    # XFetch: -log(random()) is exponentially distributed, so the chance of an
+    # early refresh grows as expiry approaches and with the recompute time
+    return time.time() - envelope["delta"] * beta * math.log(random.random() or 1e-12) >= envelope["expires"]
+
+
+def _hard_timeout(timeout):
+    # Keep stale copies around past their expiry so they can be served while refreshing
+    return timeout + settings.CACHE_STALE_TIMEOUT
+
+
+def acquire_refresh_lock(key):
+    return cache.add(_lock_key(key), 1, timeout=settings.CACHE_LOCK_TIMEOUT)
+
+
+def release_refresh_locks(*keys):
+    cache.delete_many([_lock_key(key) for key in keys])
+
+
+def get_many_protected(keys, beta=None, backend=None):
+    """
+    Read stampede-protected ``keys``.
+
+    Returns ``(values, refresh)``: ``values`` maps every key with a usable
+    value (fresh, or stale while another process refreshes it) and ``refresh``
+    lists the keys this caller holds the refresh lock for and must recompute
+    and hand to ``set_many_protected``. Keys in neither are cold misses being
+    computed elsewhere.
+
+    ``backend`` (default: the default cache) holds the values, e.g. a
+    ``TwoTierCache``; refresh locks always live in the shared default cache.
+    """
+    beta = settings.CACHE_EARLY_REFRESH_BETA if beta is None else beta
+    envelopes = (backend or cache).get_many(list(keys))
+    values, refresh = {}, []
+    for key in keys:
+        envelope = envelopes.get(key)
+        if envelope is not None and not _should_refresh(envelope, beta):
+            values[key] = envelope["value"]
+        elif acquire_refresh_lock(key):
+            refresh.append(key)
+        elif envelope is not None:
+            values[key] = envelope["value"]
+    return values, refresh
+
+
+def set_many_protected(values, timeout, delta=0.0, backend=None, release_locks=True):
+    """
+    Store freshly computed ``values`` and release their refresh locks. Pass
+    ``release_locks=False`` when the caller does not hold those locks, so the
+    process actually refreshing keeps its own.
+    """
+    envelopes = {key: _envelope(value, delta, timeout) for key, value in values.items()}
+    (backend or cache).set_many(envelopes, _hard_timeout(timeout))
+    if release_locks:
+        release_refresh_locks(*values)
+
+
+def get_or_compute(key, compute, timeout, beta=None, backend=None, name=None):
+    """
+    ``compute()`` cached under ``key`` for ``timeout`` seconds, with
+    single-flight recomputation, probabilistic early refresh and
+    stale-while-revalidate. Hits and misses are counted under ``name``.
+    """
+    values, refresh = get_many_protected([key], beta, backend)
+    if key in values:
+        if name:
+            record_cache_access(name, hit=True)
+        return values[key]
+
+    if not refresh:
+        # Cold miss another process is already computing: wait for its result
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            envelope = (backend or cache).get(key)
+            if envelope is not None:
+                if name:
+                    record_cache_access(name, hit=True)
+                return envelope["value"]
+        logger.warning(f"Cache refresh lock wait timed out - Key: {key}")
+
+    if name:
+        record_cache_access(name, hit=False)
+    started = time.monotonic()
+    try:
+        value = compute()
+    except Exception:
+        release_refresh_locks(*refresh)
+        raise
+    set_many_protected(
+        {key: value}, timeout, delta=time.monotonic() - started, backend=backend, release_locks=key in refresh
+    )
+    return value
+
+
+async def aget_or_compute(key, compute, timeout, beta=None, name=None):
+    """
+    ``get_or_compute`` for async views: same envelope, refresh lock and
+    stale-while-revalidate, through the default cache's async API.
+    ``compute`` is a coroutine function.
+    """
+    beta = settings.CACHE_EARLY_REFRESH_BETA if beta is None else beta
+    envelope = await cache.aget(key)
+    if envelope is not None and not _should_refresh(envelope, beta):
+        if name:
+            await arecord_cache_access(name, hit=True)
+        return envelope["value"]
+
+    holds_lock = await cache.aadd(_lock_key(key), 1, timeout=settings.CACHE_LOCK_TIMEOUT)
+    if not holds_lock and envelope is not None:
+        # Stale, and another process is refreshing it
+        if name:
+            await arecord_cache_access(name, hit=True)
+        return envelope["value"]
+
+    if not holds_lock:
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            envelope = await cache.aget(key)
+            if envelope is not None:
+                if name:
+                    await arecord_cache_access(name, hit=True)
+                return envelope["value"]
+        logger.warning(f"Cache refresh lock wait timed out - Key: {key}")
+
+    if name:
+        await arecord_cache_access(name, hit=False)
+    started = time.monotonic()
+    try:
+        value = await compute()
+        await cache.aset(key, _envelope(value, time.monotonic() - started, timeout), _hard_timeout(timeout))
+    finally:
+        if holds_lock:
+            await cache.adelete(_lock_key(key))
+    return value
@@ -0,0 +1,46 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Strong ETag built from ``parts``, which must identify the representation."""
+    return quote_etag(hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest())
+
+
+def versioned_etag(cache_key):
+    """
+    ETag of a listing cached under a generation-versioned ``cache_key``.
+
+    Keys built by ``request_cache_key`` embed the generations bumped by every
+    write the listing depends on, plus the audience and canonical query, so
+    they identify the rendered page without querying the table. Listings get
+    no Last-Modified: deletes and rows leaving the filtered set move no
+    timestamp, so If-Modified-Since alone could not be answered correctly.
+    """
+    return make_etag(cache_key)
+
+
+def not_modified_response(request, etag=None, last_modified=None):
+    """
+    A ``304 Not Modified`` (or ``412``) response when the request's
+    ``If-None-Match`` / ``If-Modified-Since`` preconditions say the client's
+    copy is current, otherwise ``None``.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,167 @@
+import logging
+import statistics
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from itertools import cycle
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from loan_be.celery import QueueProfileAnnotation
+from loan_be.celery import app as project_app
+
+# Burst order: slow queues are published first, the way a fraud burst floods notifications
+DEFAULT_DURATIONS = "notifications=50,fraud=5,maintenance=5"
+MEMORY_BROKER = "memory://localhost/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a burst of the project's tasks as sleeping probes, on an in-memory broker by default, routed and "
+        "profiled like the real ones, and report per-queue throughput and latency for one worker "
+        "consuming every queue and for one worker per queue"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=50, help="Probe tasks published per queue")
+        parser.add_argument("--concurrency", type=int, default=8, help="Worker threads in total for each layout")
+        parser.add_argument(
+            "--durations", default=DEFAULT_DURATIONS, help="Milliseconds each probe of a queue runs for, queue=ms,..."
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=120, help="Seconds to wait for a layout's probes before giving up"
+        )
+        parser.add_argument(
+            "--broker", default=MEMORY_BROKER,
+            help="Broker to replay the burst on, e.g. a scratch Redis database (redis://localhost:6379/15)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            durations = {
+                queue: int(ms)
+                for queue, ms in (item.split("=") for item in options["durations"].split(","))
+            }
+        except ValueError:
+            raise CommandError("--durations must look like fraud=5,notifications=50")
+
+        task_names = self.routed_task_names()
+        unknown = set(durations) - set(task_names)
+        if unknown:
+            raise CommandError(f"No task is routed to queue(s): {', '.join(sorted(unknown))}")
+        task_names = {queue: task_names[queue] for queue in durations}
+
+        if options["broker"] == MEMORY_BROKER:
+            self.stderr.write(self.style.WARNING(
+                "The in-memory broker has no event loop, so workers hand back prefetch credit only every 2s; "
+                "queues with a low prefetch_multiplier look slower than they are. Use --broker redis://... "
+                "for production-like numbers."
+            ))
+
+        # Per-task worker logging would drown the report
+        logging.getLogger("celery").setLevel(logging.WARNING)
+        for layout in ("shared", "routed"):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{layout} workers"))
+            for queue, (throughput, p50, p95) in self.run_layout(layout, task_names, durations, options).items():
+                profile = settings.CELERY_QUEUE_PROFILES[queue]
+                self.stdout.write(
+                    f"{queue}: {throughput:.1f} task(s)/sec, latency p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms "
+                    f"(rate limit {profile['rate_limit'] or 'none'}, acks_late {profile['acks_late']})"
+                )
+
+    @staticmethod
+    def routed_task_names():
+        """Project task names per queue, as CELERY_TASK_ROUTES routes them."""
+        project_app.loader.import_default_modules()
+        names = {}
+        for name in sorted(project_app.tasks):
+            if name.startswith("apps."):
+                queue = project_app.amqp.router.route({}, name)["queue"].name
+                names.setdefault(queue, []).append(name)
+        return names
+
+    @staticmethod
+    def make_app(broker, task_names, durations, finished, lock):
+        """
+        An app with the project's routes and queue profile annotations, whose
+        tasks carry the project's task names but only sleep. One per worker, as
+        queue selection is per app.
+        """
+        app = Celery("queue_load", set_as_current=False)
+        # A CELERY_BROKER_URL environment variable would override broker_url itself
+        app.conf.broker_read_url = app.conf.broker_write_url = broker
+        app.conf.broker_transport_options = {"polling_interval": 0.005}
+        app.conf.task_default_queue = settings.CELERY_TASK_DEFAULT_QUEUE
+        app.conf.task_routes = settings.CELERY_TASK_ROUTES
+        app.conf.task_annotations = [QueueProfileAnnotation()]
+        app.finalize()
+
+        probes = {}
+        for queue, names in task_names.items():
+            for name in names:
+                # Finalizing registered the real shared task under this name
+                app.tasks.pop(name, None)
+
+                def probe(self, published_at, queue=queue, duration_ms=durations[queue]):
+                    time.sleep(duration_ms / 1000)
+                    with lock:
+                        finished.append((queue, published_at, time.monotonic()))
+
+                probes[name] = app.task(name=name, bind=True, ignore_result=True, shared=False)(probe)
+        return app, probes
+
+    def run_layout(self, layout, task_names, durations, options):
+        finished, lock = [], threading.Lock()
+        queues = list(task_names)
+        if layout == "shared":
+            workers = [(queues, options["concurrency"], settings.CELERY_WORKER_PREFETCH_MULTIPLIER)]
+        else:
+            workers = [
+                ([queue], max(1, options["concurrency"] // len(queues)),
+                 settings.CELERY_QUEUE_PROFILES[queue]["prefetch_multiplier"])
+                for queue in queues
+            ]
+
+        expected = options["tasks"] * len(queues)
+        with ExitStack() as stack:
+            for worker_queues, concurrency, prefetch in workers:
+                app, _ = self.make_app(options["broker"], task_names, durations, finished, lock)
+                stack.enter_context(start_worker(
+                    app, concurrency=concurrency, pool="threads", perform_ping_check=False,
+                    queues=worker_queues, prefetch_multiplier=prefetch, loglevel="WARNING",
+                ))
+            _, probes = self.make_app(options["broker"], task_names, durations, finished, lock)
+            for queue in queues:
+                # No queue= here: CELERY_TASK_ROUTES picks it, as for the real tasks
+                for _, name in zip(range(options["tasks"]), cycle(task_names[queue])):
+                    probes[name].apply_async((time.monotonic(),))
+            deadline = time.monotonic() + options["timeout"]
+            while len(finished) < expected and time.monotonic() < deadline:
+                time.sleep(0.01)
+            with lock:
+                finished = list(finished)
+
+        if len(finished) < expected:
+            # A crashed or wedged worker would otherwise hang the command forever
+            done = Counter(queue for queue, _, _ in finished)
+            missing = ", ".join(
+                f"{queue}: {options['tasks'] - done[queue]}" for queue in queues if done[queue] < options["tasks"]
+            )
+            self.stderr.write(self.style.WARNING(
+                f"{layout} workers timed out after {options['timeout']:g}s; probes never finished - {missing}"
+            ))
+
+        results = {}
+        for queue in queues:
+            rows = [row for row in finished if row[0] == queue]
+            if not rows:
+                continue
+            latencies = sorted(done - published for _, published, done in rows)
+            elapsed = max(done for _, _, done in rows) - min(published for _, published, _ in rows)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            results[queue] = (len(rows) / elapsed, statistics.median(latencies), p95)
+        return results
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the cached API views"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Caches to report (default: all tracked caches)")
+        parser.add_argument("--reset", action="store_true", help="Zero the counters after reporting them")
+
+    def handle(self, *args, **options):
+        names = options["names"]
+        for name, counts in cache_stats(*names).items():
+            total = counts["hits"] + counts["misses"]
+            rate = counts["hits"] / total * 100 if total else 0
+            self.stdout.write(f"{name}: {counts['hits']} hit(s), {counts['misses']} miss(es), {rate:.1f}% hit rate")
+
+        if options["reset"]:
+            reset_cache_stats(*names)
+            self.stdout.write(self.style.SUCCESS("Cache counters reset"))
@@ -12,3 +12,36 @@ class TimeStampedModel(models.Model):
     class Meta:
         abstract = True
         ordering = ["-created_at", "-updated_at"]
+
+
+class TaskOutboxQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(published_at__isnull=True)
+
+
+class TaskOutboxMessage(models.Model):
+    """
+    A Celery task to publish once the transaction that wrote it commits.
+
+    Written with the data the task works on, so a rollback discards both and
+    a broker outage only delays publishing; see ``apps.common.outbox``.
+    """
+    pkid = models.BigAutoField(primary_key=True, editable=False)
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    objects = TaskOutboxQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["pkid"]
+        indexes = [
+            models.Index(fields=["pkid"], condition=models.Q(published_at__isnull=True), name="task_outbox_pending"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} ({'published' if self.published_at else 'pending'})"
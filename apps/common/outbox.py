@@ -0,0 +1,93 @@
+import logging
+import time
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TaskOutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time until which the on_commit fast path is skipped after a broker failure
+_fast_path_paused_until = 0.0
+
+
+class TaskOutbox:
+    """
+    Transactional outbox for Celery tasks.
+
+    ``enqueue`` stores the task call in the caller's transaction. Right after
+    commit the message is published without broker retries (the fast path);
+    whatever that misses is drained in batches by the ``relay_task_outbox``
+    beat task. Delivery is at least once, so tasks sent this way must be
+    idempotent.
+    """
+
+    @staticmethod
+    def enqueue(task, *args, **kwargs):
+        """Publish ``task(*args, **kwargs)`` once the current transaction commits."""
+        message = TaskOutboxMessage.objects.create(task_name=task.name, args=list(args), kwargs=kwargs)
+        transaction.on_commit(lambda: TaskOutbox.publish_committed(message.pkid))
+        return message
+
+    @staticmethod
+    def publish_committed(pkid):
+        global _fast_path_paused_until
+        if time.monotonic() < _fast_path_paused_until:
+            return
+        _, failed = TaskOutbox.relay(pkids=[pkid], retry=False)
+        if failed:
+            # Leave publishing to the relay for a while instead of failing every request
+            _fast_path_paused_until = time.monotonic() + settings.TASK_OUTBOX_FAST_PATH_COOLDOWN
+
+    @staticmethod
+    def relay(pkids=None, batch_size=None, retry=True):
+        """
+        Publish one batch of pending messages (or just ``pkids``).
+
+        Rows are locked with SKIP LOCKED, so the fast path and any number of
+        relays never publish the same message twice. Returns the number of
+        messages published and failed.
+        """
+        with transaction.atomic():
+            messages = TaskOutboxMessage.objects.pending().filter(attempts__lt=settings.TASK_OUTBOX_MAX_ATTEMPTS)
+            if pkids is not None:
+                messages = messages.filter(pkid__in=pkids)
+            batch_size = batch_size or settings.TASK_OUTBOX_BATCH_SIZE
+            messages = list(messages.select_for_update(skip_locked=True).order_by("pkid")[:batch_size])
+
+            published, failed = [], []
+            for message in messages:
+                try:
+                    current_app.tasks[message.task_name].apply_async(message.args, message.kwargs, retry=retry)
+                except Exception as e:
+                    logger.error(f"Task outbox publish failed - Task: {message.task_name}, Error: {str(e)}")
+                    message.attempts += 1
+                    message.last_error = str(e)
+                    failed.append(message)
+                else:
+                    message.published_at = timezone.now()
+                    published.append(message)
+
+            TaskOutboxMessage.objects.bulk_update(published, ["published_at"])
+            TaskOutboxMessage.objects.bulk_update(failed, ["attempts", "last_error"])
+        return len(published), len(failed)
+
+    @staticmethod
+    def relay_pending():
+        """Drain the outbox batch by batch until it is empty or the broker fails; returns how many were published."""
+        total = 0
+        while True:
+            published, failed = TaskOutbox.relay()
+            total += published
+            if failed or published < settings.TASK_OUTBOX_BATCH_SIZE:
+                return total
+
+    @staticmethod
+    def purge_published():
+        cutoff = timezone.now() - timedelta(seconds=settings.TASK_OUTBOX_RETENTION)
+        deleted, _ = TaskOutboxMessage.objects.filter(published_at__lt=cutoff).delete()
+        return deleted
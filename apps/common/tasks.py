@@ -0,0 +1,17 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def relay_task_outbox():
+    """Publish outbox messages the on_commit fast path missed and purge old published ones"""
+    from .outbox import TaskOutbox
+
+    published = TaskOutbox.relay_pending()
+    purged = TaskOutbox.purge_published()
+    if published or purged:
+        logger.info(f"Task outbox relayed - Published: {published}, Purged: {purged}")
+    return f"Published {published} task(s)"
@@ -0,0 +1,12 @@
+from rest_framework.throttling import BaseThrottle
+
+
+def client_ip(request):
+    """
+    Address of the client that sent ``request``, resolved as DRF's throttles do.
+
+    Behind ``NUM_PROXIES`` reverse proxies (the bundled nginx is one) this is
+    the address the outermost proxy saw, taken from X-Forwarded-For; a request
+    that did not pass through a proxy falls back to REMOTE_ADDR.
+    """
+    return BaseThrottle().get_ident(request)
@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .velocity import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalLRUCache:
+    """Bounded, thread-safe in-process cache with a per-entry time to live."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        if timeout <= 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class InvalidationBus:
+    """
+    Fans key invalidations out to every process over Redis pub/sub.
+
+    Each process subscribes lazily from a daemon thread (restarted after a
+    fork, so gunicorn workers each get their own) and drops the published
+    keys from its registered local caches. Without Redis nothing is
+    published and local copies simply age out after their time to live.
+
+    Messages carry a random per-process ``origin`` token so a process skips
+    its own invalidations; PIDs would collide across containers.
+    """
+
+    def __init__(self, channel, alias="default"):
+        self.channel = channel
+        self.alias = alias
+        self.caches = {}
+        self.origin = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def register(self, namespace, local_cache):
+        self.caches[namespace] = local_cache
+
+    def ensure_listening(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Copies inherited from the parent process missed its invalidations
+            for local_cache in self.caches.values():
+                local_cache.clear()
+            # A forked child must not share its parent's token, or each would skip the other's messages
+            self.origin = secrets.token_hex(16)
+            _, client = get_redis_client(self.alias)
+            self._pid = os.getpid()
+            if client is None:
+                return
+            thread = threading.Thread(target=self._listen, args=(client,), name="cache-invalidation", daemon=True)
+            thread.start()
+
+    def _listen(self, client):
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.handle(message["data"])
+            except Exception as e:
+                logger.error(f"Cache invalidation listener error - Channel: {self.channel}, Error: {str(e)}")
+                # Anything published while disconnected was missed
+                for local_cache in self.caches.values():
+                    local_cache.clear()
+                time.sleep(1)
+
+    def handle(self, payload):
+        message = json.loads(payload)
+        local_cache = self.caches.get(message["namespace"])
+        if local_cache is None:
+            return
+        if message["origin"] == self.origin:
+            return
+        for key in message["keys"]:
+            local_cache.delete(key)
+
+    def publish(self, namespace, keys):
+        self.ensure_listening()
+        _, client = get_redis_client(self.alias)
+        if client is None:
+            return
+        payload = json.dumps({"namespace": namespace, "origin": self.origin, "keys": list(keys)})
+        try:
+            client.publish(self.channel, payload)
+        except Exception as e:
+            logger.error(f"Cache invalidation publish failed - Channel: {self.channel}, Error: {str(e)}")
+
+
+invalidation_bus = InvalidationBus(settings.CACHE_INVALIDATION_CHANNEL)
+
+
+class TwoTierCache:
+    """
+    In-process LRU in front of a shared Django cache (Redis).
+
+    Reads are answered from process memory when possible and fall through to
+    the shared cache otherwise; writes and deletes go to both tiers and are
+    published on the invalidation bus so other processes drop their copy.
+    Exposes the subset of the Django cache API used by ``apps.common.cache``,
+    so it can be passed as the ``backend`` of the stampede-protected helpers.
+    Local hits hand out the cached object itself, so treat values as read-only.
+    """
+
+    def __init__(self, namespace, max_entries=None, timeout=None, alias="default", bus=invalidation_bus):
+        self.namespace = namespace
+        self.alias = alias
+        self.local = LocalLRUCache(
+            max_entries or settings.LOCAL_CACHE_MAX_ENTRIES,
+            settings.LOCAL_CACHE_TIMEOUT if timeout is None else timeout,
+        )
+        self.bus = bus
+        bus.register(namespace, self.local)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get(self, key, default=None):
+        self.bus.ensure_listening()
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+        value = self.shared.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.local.set(key, value)
+        return value
+
+    def get_many(self, keys):
+        self.bus.ensure_listening()
+        found, remote = {}, []
+        for key in keys:
+            value = self.local.get(key)
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            for key, value in self.shared.get_many(remote).items():
+                self.local.set(key, value)
+                found[key] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.set_many({key: value}, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT):
+        self.bus.ensure_listening()
+        self.shared.set_many(data, timeout=timeout)
+        local_timeout = None if timeout is DEFAULT_TIMEOUT or timeout is None else timeout
+        for key, value in data.items():
+            self.local.set(key, value, local_timeout)
+        self.bus.publish(self.namespace, data)
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        self.shared.delete_many(keys)
+        for key in keys:
+            self.local.delete(key)
+        self.bus.publish(self.namespace, keys)
@@ -0,0 +1,118 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def get_redis_client(alias="default"):
+    """
+    ``(backend, client)`` for a cache alias: the Django cache backend and the
+    raw redis-py client behind it, or ``(backend, None)`` when the backend is
+    not Redis (DummyCache in tests, LocMemCache, ...) or cannot be reached.
+    """
+    backend = caches[alias]
+    try:
+        if hasattr(backend, "_cache") and hasattr(backend._cache, "get_client"):
+            # django.core.cache.backends.redis.RedisCache
+            return backend, backend._cache.get_client(write=True)
+        if hasattr(backend, "client") and hasattr(backend.client, "get_client"):
+            # django_redis.cache.RedisCache
+            return backend, backend.client.get_client(write=True)
+    except Exception as e:
+        logger.error(f"Redis client unavailable - Alias: {alias}, Error: {str(e)}")
+    return backend, None
+
+
+class SlidingWindowCounter:
+    """
+    Event counter over sliding time windows, one Redis sorted set per
+    ``(dimension, identifier)`` with the event timestamp as score.
+
+    Every method returns None when Redis cannot be reached so that callers
+    fall back to counting rows in the database.
+    """
+
+    def __init__(self, namespace, windows=None, alias="default"):
+        self.namespace = namespace
+        self.windows = dict(windows or settings.VELOCITY_WINDOWS)
+        self.retention = max(self.windows.values())
+        self.alias = alias
+
+    def _client(self):
+        return get_redis_client(self.alias)
+
+    def _key(self, backend, dimension, identifier):
+        return backend.make_key(f"velocity:{self.namespace}:{dimension}:{identifier}")
+
+    def record(self, dimension, identifier, member, timestamp=None):
+        """
+        Add an event. Returns False when the set did not exist before, which
+        tells the caller it holds only this event and may need rebuilding.
+        """
+        return self.record_many(dimension, identifier, [(member, timestamp or time.time())])
+
+    def record_many(self, dimension, identifier, events):
+        """Add ``(member, timestamp)`` events in one round-trip; see ``record``."""
+        events = list(events)
+        if not events:
+            return True
+        backend, client = self._client()
+        if client is None:
+            return None
+        latest = max(timestamp for _, timestamp in events)
+        key = self._key(backend, dimension, identifier)
+        try:
+            pipe = client.pipeline()
+            pipe.exists(key)
+            pipe.zadd(key, {str(member): timestamp for member, timestamp in events})
+            pipe.zremrangebyscore(key, "-inf", latest - self.retention)
+            pipe.expire(key, self.retention)
+            existed = pipe.execute()[0]
+        except Exception as e:
+            logger.error(f"Velocity record failed - Key: {key}, Error: {str(e)}")
+            return None
+        return bool(existed)
+
+    def counts(self, dimension, identifier, windows=None, now=None):
+        """Number of events per window name, or None if the set is missing."""
+        backend, client = self._client()
+        if client is None:
+            return None
+        now = now or time.time()
+        names = list(windows or self.windows)
+        key = self._key(backend, dimension, identifier)
+        try:
+            pipe = client.pipeline()
+            pipe.exists(key)
+            for name in names:
+                pipe.zcount(key, now - self.windows[name], "+inf")
+            results = pipe.execute()
+        except Exception as e:
+            logger.error(f"Velocity lookup failed - Key: {key}, Error: {str(e)}")
+            return None
+        if not results[0]:
+            return None
+        return dict(zip(names, results[1:]))
+
+    def rebuild(self, dimension, identifier, events):
+        """Replace the set with ``events``, an iterable of ``(member, timestamp)``."""
+        backend, client = self._client()
+        if client is None:
+            return False
+        key = self._key(backend, dimension, identifier)
+        cutoff = time.time() - self.retention
+        mapping = {str(member): timestamp for member, timestamp in events if timestamp >= cutoff}
+        try:
+            pipe = client.pipeline()
+            pipe.delete(key)
+            if mapping:
+                pipe.zadd(key, mapping)
+                pipe.expire(key, self.retention)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Velocity rebuild failed - Key: {key}, Error: {str(e)}")
+            return False
+        return True
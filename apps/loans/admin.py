@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import LoanApplication, FraudFlag
+from django.db import transaction
+from django.utils import timezone
+from .caching import invalidate_loan_lists
+from .models import LoanApplication, FraudFlag, FraudNotification, LoanDailyStats
+from .stats import LoanStatsService
 
 
 class FraudFlagInline(admin.TabularInline):
@@ -13,22 +17,49 @@ class LoanApplicationAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'amount_requested', 'status', 'date_applied']
     list_filter = ['status', 'date_applied']
     search_fields = ['user__email', 'user__username']
+    list_select_related = ['user']
     readonly_fields = ['date_applied', 'date_updated']
     inlines = [FraudFlagInline]
 
     actions = ['approve_loans', 'reject_loans']
 
+    def set_status(self, queryset, status):
+        # queryset.update() sends no signals, so caches and stats are updated here
+        user_pks = set(queryset.values_list('user_id', flat=True))
+        with transaction.atomic():
+            LoanStatsService.record_queryset_status_change(queryset, status)
+            queryset.update(status=status, date_updated=timezone.now())
+        invalidate_loan_lists(*user_pks)
+
     def approve_loans(self, request, queryset):
-        queryset.update(status='approved')
+        self.set_status(queryset, 'approved')
     approve_loans.short_description = "Approve selected loans"
 
     def reject_loans(self, request, queryset):
-        queryset.update(status='rejected')
+        self.set_status(queryset, 'rejected')
     reject_loans.short_description = "Reject selected loans"
 
 
 @admin.register(FraudFlag)
 class FraudFlagAdmin(admin.ModelAdmin):
     list_display = ['loan_application', 'reason', 'created_at']
+    list_select_related = ['loan_application__user']
     list_filter = ['created_at']
     search_fields = ['reason', 'loan_application__user__email']
+
+
+@admin.register(LoanDailyStats)
+class LoanDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['day', 'status', 'flag_reason', 'loan_count', 'amount_total']
+    list_filter = ['status', 'day']
+    search_fields = ['flag_reason']
+    readonly_fields = ['day', 'status', 'flag_reason', 'loan_count', 'amount_total']
+
+
+@admin.register(FraudNotification)
+class FraudNotificationAdmin(admin.ModelAdmin):
+    list_display = ['loan_application', 'created_at', 'sent_at']
+    list_select_related = ['loan_application__user']
+    list_filter = ['sent_at', 'created_at']
+    search_fields = ['loan_application__user__email']
+    readonly_fields = ['loan_application', 'reasons', 'claimed_at', 'sent_at']
@@ -5,4 +5,7 @@ from django.utils.translation import gettext_lazy as _
 class LoansConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.loans"
-    verbose_name = _("Loans Management")
\ No newline at end of file
+    verbose_name = _("Loans Management")
+
+    def ready(self):
+        from . import signals  # noqa: F401
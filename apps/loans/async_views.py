@@ -0,0 +1,231 @@
+import logging
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.common.cache import aget_or_compute
+from apps.common.conditional import make_etag, not_modified_response, set_validators, versioned_etag
+from apps.common.renderers import FastJSONRenderer
+from apps.users.authentication import CachedJWTAuthentication
+
+from .caching import FLAGGED_LOANS_CACHE, LOAN_LIST_CACHE, flagged_loans_cache_key, loan_list_cache_key
+from .models import LoanApplication, LoanStatus
+from .paginations import LoanCursorPagination, LoanPagination, LoanPaginationMixin
+from .serializers import LoanApplicationListSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLoanReadView(View):
+    """
+    Read-only loan endpoints as native async views, for ASGI deployments.
+
+    Queries go through Django's async ORM and cache API, so under uvicorn a
+    worker keeps serving other requests while one waits on Postgres or Redis.
+    Bodies and pagination, page numbers or keyset cursors picked as
+    ``LoanPaginationMixin`` picks them, match the DRF endpoint each view
+    mirrors. ETags and cache keys are built the same way but include the
+    request URL, so they differ from the sync endpoint's. Authentication is
+    the project's JWT scheme.
+    """
+
+    http_method_names = ['get', 'head', 'options']
+    authentication_class = CachedJWTAuthentication
+    staff_only = False
+    renderer = FastJSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await sync_to_async(self.authenticate)(request)
+            if self.staff_only and not request.user.is_staff:
+                raise exceptions.PermissionDenied()
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.error_response(exc)
+
+    def authenticate(self, request):
+        authenticator = self.authentication_class()
+        result = authenticator.authenticate(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        return result[0]
+
+    def error_response(self, exc):
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(detail, exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            response['WWW-Authenticate'] = self.authentication_class().authenticate_header(None)
+        return response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(
+            self.renderer.render(data), content_type=self.renderer.media_type, status=status_code
+        )
+
+
+class AsyncLoanListMixin:
+    """Filtered, paginated and cached listing of ``values()`` rows, like ``LoanListFastPathMixin``."""
+
+    cache_name = None
+    filterable = False
+    ordering_fields = ('date_applied', 'amount_requested')
+    ordering = ('-date_applied',)
+    pagination = LoanPagination
+    list_serializer_class = LoanApplicationListSerializer
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    def get_cache_key(self, request):
+        raise NotImplementedError
+
+    def filter_queryset(self, request, queryset):
+        """``?status=`` and ``?ordering=`` as DjangoFilterBackend and OrderingFilter apply them"""
+        if not self.filterable:
+            return queryset
+        loan_status = request.GET.get('status')
+        if loan_status:
+            if loan_status not in LoanStatus.values:
+                raise exceptions.ValidationError({'status': [
+                    f'Select a valid choice. {loan_status} is not one of the available choices.'
+                ]})
+            queryset = queryset.filter(status=loan_status)
+        ordering = [
+            term.strip() for term in request.GET.get('ordering', '').split(',')
+            if term.strip().lstrip('-') in self.ordering_fields
+        ]
+        return queryset.order_by(*(ordering or self.ordering))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.GET[self.pagination.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.pagination.page_size
+        if size <= 0:
+            return self.pagination.page_size
+        return min(size, self.pagination.max_page_size)
+
+    async def paginate(self, request, queryset):
+        page_size = self.get_page_size(request)
+        count = await queryset.acount()
+        num_pages = max(1, math.ceil(count / page_size))
+        page_number = request.GET.get(self.pagination.page_query_param, 1)
+        if page_number in self.pagination.last_page_strings:
+            page_number = num_pages
+        try:
+            page_number = int(page_number)
+        except (TypeError, ValueError):
+            raise exceptions.NotFound('Invalid page.')
+        if not 1 <= page_number <= num_pages:
+            raise exceptions.NotFound('Invalid page.')
+
+        offset = (page_number - 1) * page_size
+        rows = queryset.values(*self.list_serializer_class.value_fields)[offset:offset + page_size]
+        page = [row async for row in rows.aiterator()]
+
+        url = request.build_absolute_uri()
+        next_link = previous_link = None
+        if page_number < num_pages:
+            next_link = replace_query_param(url, self.pagination.page_query_param, page_number + 1)
+        if page_number == 2:
+            previous_link = remove_query_param(url, self.pagination.page_query_param)
+        elif page_number > 2:
+            previous_link = replace_query_param(url, self.pagination.page_query_param, page_number - 1)
+        return {
+            'count': count,
+            'next': next_link,
+            'previous': previous_link,
+            'results': self.list_serializer_class(page, many=True).data,
+        }
+
+    async def paginate_cursor(self, request, queryset):
+        """Keyset page through ``LoanCursorPagination``; ``request`` is the DRF request it reads."""
+        paginator = LoanCursorPagination()
+        rows = paginator.page_queryset(queryset.values(*self.list_serializer_class.value_fields), request)
+        page = paginator.paginate_rows([row async for row in rows.aiterator()])
+        return {
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': self.list_serializer_class(page, many=True).data,
+        }
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(request, self.get_queryset(request))
+
+        # request_cache_key reads the DRF request API (query_params, version)
+        drf_request = Request(request)
+        drf_request.user = request.user
+        key = await sync_to_async(self.get_cache_key)(drf_request)
+        etag = versioned_etag(key)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        cursor_mode = LoanPaginationMixin.get_pagination_class(drf_request.query_params) is LoanCursorPagination
+
+        async def render():
+            if cursor_mode:
+                data = await self.paginate_cursor(drf_request, queryset)
+            else:
+                data = await self.paginate(request, queryset)
+            logger.info(f"Async loans list cached - View: {type(self).__name__}, User: {request.user.id}")
+            return data
+
+        data = await aget_or_compute(key, render, timeout=300, name=self.cache_name)
+        return set_validators(self.render(data), etag)
+
+
+class AsyncLoanListView(AsyncLoanListMixin, AsyncLoanReadView):
+    """Async counterpart of ``LoanApplicationViewSet.list``."""
+
+    cache_name = LOAN_LIST_CACHE
+    filterable = True
+
+    def get_queryset(self, request):
+        queryset = LoanApplication.objects.for_listing()
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        return queryset
+
+    def get_cache_key(self, request):
+        return loan_list_cache_key(request)
+
+
+class AsyncFlaggedLoansView(AsyncLoanListMixin, AsyncLoanReadView):
+    """Async counterpart of ``FlaggedLoansView``."""
+
+    cache_name = FLAGGED_LOANS_CACHE
+    staff_only = True
+
+    def get_queryset(self, request):
+        return LoanApplication.objects.filter(status=LoanStatus.FLAGGED).for_listing()
+
+    def get_cache_key(self, request):
+        return flagged_loans_cache_key(request)
+
+
+class AsyncLoanDetailView(AsyncLoanReadView):
+    """Async counterpart of ``LoanApplicationViewSet.retrieve``."""
+
+    serializer_class = LoanApplicationListSerializer
+
+    async def get(self, request, pk):
+        queryset = LoanApplication.objects.filter(pk=pk)
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        row = await queryset.values(*self.serializer_class.value_fields).afirst()
+        if row is None:
+            raise exceptions.NotFound('No LoanApplication matches the given query.')
+
+        etag = make_etag(row['id'], row['date_updated'].timestamp(), row['user__email'])
+        not_modified = not_modified_response(request, etag, row['date_updated'])
+        if not_modified is not None:
+            return not_modified
+        data = self.serializer_class([row], many=True).data[0]
+        return set_validators(self.render(data), etag, row['date_updated'])
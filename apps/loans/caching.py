@@ -0,0 +1,31 @@
+from apps.common.cache import bump_generation, request_cache_key, track_cache
+
+from .stats import STATS_SCOPE
+
+ALL_LOANS_SCOPE = "loans:all"
+
+LOAN_LIST_CACHE = track_cache("loans_list")
+FLAGGED_LOANS_CACHE = track_cache("flagged_loans_list")
+LOAN_STATS_CACHE = track_cache("loan_stats")
+
+
+def user_loans_scope(user_pk):
+    return f"loans:user:{user_pk}"
+
+
+def invalidate_loan_lists(*user_pks):
+    """Drop cached loan lists of the given users plus every staff-wide list."""
+    bump_generation(ALL_LOANS_SCOPE, *{user_loans_scope(user_pk) for user_pk in user_pks})
+
+
+def loan_list_cache_key(request):
+    scope = ALL_LOANS_SCOPE if request.user.is_staff else user_loans_scope(request.user.pk)
+    return request_cache_key(LOAN_LIST_CACHE, request, [scope])
+
+
+def flagged_loans_cache_key(request):
+    return request_cache_key(FLAGGED_LOANS_CACHE, request, [ALL_LOANS_SCOPE])
+
+
+def loan_stats_cache_key(request):
+    return request_cache_key(LOAN_STATS_CACHE, request, [STATS_SCOPE])
@@ -0,0 +1,290 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Func, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.common.cache import get_many_protected, release_refresh_locks, set_many_protected
+from apps.common.tiered_cache import TwoTierCache
+from apps.users.models import DomainUsage, domain_from_email
+
+from .models import LoanApplication
+from .velocity import loan_velocity
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+FACTS = {}
+RULES = []
+
+# Cacheable facts (domain user counts) change slowly and are read on every submission
+fact_cache = TwoTierCache("fraud_facts")
+
+
+def register_fact(fact_class):
+    """Register a fact provider under its ``name``."""
+    FACTS[fact_class.name] = fact_class()
+    return fact_class
+
+
+def register_rule(rule_class):
+    """Register a rule class; rules are evaluated in registration order."""
+    RULES.append(rule_class)
+    return rule_class
+
+
+def count_subquery(queryset):
+    """COUNT(*) over ``queryset`` as a scalar subquery defaulting to 0."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().annotate(n=Func("pk", function="COUNT")).values("n")[:1],
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class FraudSubject:
+    """
+    The user and requested amount a set of rules is evaluated against.
+
+    ``pending_loans`` counts submissions from the same batch that are not in
+    the database yet, so batch evaluation matches one-by-one submission.
+    """
+
+    def __init__(self, user, amount_requested, pending_loans=0):
+        self.user = user
+        self.amount_requested = amount_requested
+        self.pending_loans = pending_loans
+
+    @property
+    def email_domain(self):
+        return self.user.email_domain or domain_from_email(self.user.email)
+
+
+class FraudFact:
+    """
+    A piece of data one or more rules depend on.
+
+    Facts are resolved by the engine rather than by the rules themselves so
+    that every fact needed for a submission is fetched together: precomputed
+    counters via ``lookup``, cacheable facts in a single cache round-trip
+    and the rest as annotations on a single query against the user row.
+    """
+
+    name = None
+    cache_timeout = None
+
+    def lookup(self, subject):
+        return None
+
+    def cache_key(self, subject):
+        return None
+
+    def annotation(self):
+        """Expression correlated on the outer ``User`` row via ``OuterRef``."""
+        raise NotImplementedError
+
+
+class FraudRule:
+    """A single check; ``evaluate`` returns True when the rule is triggered."""
+
+    reason = None
+    requires = ()
+
+    def evaluate(self, subject, facts):
+        raise NotImplementedError
+
+    def describe(self, subject, facts):
+        return f"User: {subject.user.id}"
+
+
+class LoanVelocityFact(FraudFact):
+    """Loans submitted within ``window``, read from the sliding-window counters."""
+
+    dimension = "user"
+    window = None
+
+    def identifier(self, subject):
+        return subject.user.pk
+
+    def lookup(self, subject):
+        counts = loan_velocity.counts(self.dimension, self.identifier(subject), [self.window])
+        return counts[self.window] if counts else None
+
+
+@register_fact
+class RecentLoanCountFact(LoanVelocityFact):
+    name = "recent_loan_count"
+    window = "24h"
+
+    def annotation(self):
+        since = timezone.now() - timedelta(seconds=loan_velocity.windows[self.window])
+        return count_subquery(
+            LoanApplication.objects.filter(user=OuterRef("pk"), date_applied__gte=since)
+        )
+
+
+@register_fact
+class DomainUserCountFact(FraudFact):
+    name = "domain_user_count"
+    cache_timeout = 3600
+
+    def cache_key(self, subject):
+        return f"domain_users_{subject.email_domain}"
+
+    def annotation(self):
+        return Coalesce(
+            Subquery(
+                DomainUsage.objects.filter(domain=OuterRef("email_domain")).values("active_users")[:1],
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+
+@register_rule
+class LoanVelocityRule(FraudRule):
+    reason = "User submitted more than 3 loans in past 24 hours"
+    requires = ("recent_loan_count",)
+    threshold = 3
+
+    def evaluate(self, subject, facts):
+        return facts["recent_loan_count"] + subject.pending_loans >= self.threshold
+
+
+@register_rule
+class HighAmountRule(FraudRule):
+    reason = "Requested amount exceeds NGN 5,000,000"
+    limit = 5000000
+
+    def evaluate(self, subject, facts):
+        return subject.amount_requested > self.limit
+
+    def describe(self, subject, facts):
+        return f"User: {subject.user.id}, Amount: {subject.amount_requested}"
+
+
+@register_rule
+class SharedEmailDomainRule(FraudRule):
+    reason = "Email domain used by more than 10 users"
+    requires = ("domain_user_count",)
+    threshold = 10
+
+    def evaluate(self, subject, facts):
+        return facts["domain_user_count"] > self.threshold
+
+    def describe(self, subject, facts):
+        return f"User: {subject.user.id}, Domain: {subject.email_domain}"
+
+
+class FraudRuleEngine:
+    """
+    Evaluates the registered rules for one or many subjects.
+
+    The engine works out which facts the active rules need, reads counters
+    and cacheable ones with one round-trip each and computes whatever is left
+    in a single annotated query over all users involved, so the number of
+    round-trips stays the same as rules (or subjects) are added.
+    """
+
+    def __init__(self, rules=None):
+        rule_classes = RULES if rules is None else rules
+        self.rules = [rule_class() for rule_class in rule_classes]
+
+    def required_facts(self):
+        names = []
+        for rule in self.rules:
+            for name in rule.requires:
+                if name not in names:
+                    names.append(name)
+        return [FACTS[name] for name in names]
+
+    def gather_many(self, subjects):
+        """Facts for each distinct user among ``subjects``, keyed by user pk."""
+        by_user = {}
+        for subject in subjects:
+            by_user.setdefault(subject.user.pk, subject)
+        facts = {user_pk: {} for user_pk in by_user}
+        required = self.required_facts()
+        if not required:
+            return facts
+
+        for user_pk, subject in by_user.items():
+            for fact in required:
+                value = fact.lookup(subject)
+                if value is not None:
+                    facts[user_pk][fact.name] = value
+
+        cache_keys = {}
+        for user_pk, subject in by_user.items():
+            for fact in required:
+                if fact.name in facts[user_pk]:
+                    continue
+                key = fact.cache_key(subject)
+                if key is not None:
+                    cache_keys.setdefault(key, []).append((user_pk, fact))
+        refresh = []
+        if cache_keys:
+            # Only the process holding a key's refresh lock recomputes and stores it;
+            # the others use the stale value or compute without storing
+            values, refresh = get_many_protected(list(cache_keys), backend=fact_cache)
+            for key, value in values.items():
+                for user_pk, fact in cache_keys[key]:
+                    facts[user_pk][fact.name] = value
+
+        try:
+            missing = {}
+            for user_pk in by_user:
+                for fact in required:
+                    if fact.name not in facts[user_pk]:
+                        missing.setdefault(fact.name, fact)
+            if missing:
+                started = time.monotonic()
+                rows = (
+                    User.objects.filter(pk__in=[pk for pk in by_user if len(facts[pk]) < len(required)])
+                    .annotate(**{name: fact.annotation() for name, fact in missing.items()})
+                    .values("pk", *missing)
+                )
+                for row in rows:
+                    user_pk = row.pop("pk")
+                    for name, value in row.items():
+                        facts[user_pk].setdefault(name, value)
+                delta = time.monotonic() - started
+
+                to_cache = {}
+                for key in refresh:
+                    for user_pk, fact in cache_keys[key]:
+                        if fact.name in facts[user_pk]:
+                            to_cache.setdefault(fact.cache_timeout, {})[key] = facts[user_pk][fact.name]
+                for timeout, values in to_cache.items():
+                    set_many_protected(values, timeout, delta=delta, backend=fact_cache)
+        finally:
+            release_refresh_locks(*refresh)
+
+        for user_facts in facts.values():
+            for fact in required:
+                user_facts.setdefault(fact.name, 0)
+        return facts
+
+    def gather(self, subject):
+        return self.gather_many([subject])[subject.user.pk]
+
+    def evaluate_with(self, subject, facts):
+        reasons = []
+        for rule in self.rules:
+            if rule.evaluate(subject, facts):
+                reasons.append(rule.reason)
+                logger.warning(f"Fraud flag: {rule.reason} - {rule.describe(subject, facts)}")
+        return reasons
+
+    def evaluate(self, subject):
+        return self.evaluate_with(subject, self.gather(subject))
+
+    def evaluate_many(self, subjects):
+        """Reasons for each subject, in order, from a single fact-gathering pass."""
+        facts = self.gather_many(subjects)
+        return [self.evaluate_with(subject, facts[subject.user.pk]) for subject in subjects]
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.loans.models import LoanApplication
+
+
+class Command(BaseCommand):
+    help = "Rewrite LoanApplication.flag_reasons/flag_count from the FraudFlag rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Loans processed per pkid range")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pkid = LoanApplication.objects.order_by("-pkid").values_list("pkid", flat=True).first() or 0
+
+        fixed = 0
+        for start in range(0, last_pkid, batch_size):
+            fixed += LoanApplication.objects.filter(pkid__gt=start, pkid__lte=start + batch_size).sync_flag_summary()
+
+        self.stdout.write(self.style.SUCCESS(f"Updated the flag summary of {fixed} loan application(s)"))
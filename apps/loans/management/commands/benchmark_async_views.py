@@ -0,0 +1,148 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    aiohttp = None
+
+User = get_user_model()
+
+SERVERS = {
+    # name: (command, read path)
+    "gunicorn (WSGI, sync views)": (
+        ["gunicorn", "loan_be.wsgi:application", "--workers", "{workers}", "--bind", "127.0.0.1:{port}"],
+        "/api/v1/loans/{endpoint}/",
+    ),
+    "uvicorn (ASGI, async views)": (
+        [
+            "uvicorn", "loan_be.asgi:application", "--workers", "{workers}", "--port", "{port}",
+            "--lifespan", "off", "--log-level", "warning",
+        ],
+        "/api/v1/loans/async/{endpoint}/",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project under gunicorn (sync loan views) and uvicorn (async loan views) and compare "
+        "throughput and latency of concurrent reads of the same listing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", required=True, help="User the requests authenticate as")
+        parser.add_argument(
+            "--endpoint", choices=["applications", "flagged"], default="applications", help="Listing to read"
+        )
+        parser.add_argument("--requests", type=int, default=500, help="Requests sent to each server")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+        parser.add_argument("--workers", type=int, default=2, help="Worker processes of each server")
+        parser.add_argument("--query", default="", help="Query string appended to the listing URL, e.g. page=2")
+
+    def handle(self, *args, **options):
+        if aiohttp is None:
+            raise CommandError("aiohttp is required to drive the benchmark")
+        try:
+            user = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+        token = str(AccessToken.for_user(user))
+
+        for name, (command, path) in SERVERS.items():
+            port = self.free_port()
+            command = [part.format(workers=options["workers"], port=port) for part in command]
+            url = f"http://127.0.0.1:{port}{path.format(endpoint=options['endpoint'])}"
+            if options["query"]:
+                url = f"{url}?{options['query']}"
+
+            with self.serve(command, url):
+                latencies, errors, elapsed = asyncio.run(self.load(url, token, options))
+
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if not latencies:
+                self.stderr.write(self.style.ERROR(f"Every request failed ({errors} error(s))"))
+                continue
+            p50 = statistics.median(latencies)
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            self.stdout.write(
+                f"{len(latencies) / elapsed:.1f} req/sec, latency p50 {p50 * 1000:.1f} ms, "
+                f"p95 {p95 * 1000:.1f} ms, {errors} error(s)"
+            )
+
+    @staticmethod
+    def free_port():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    def serve(self, command, url):
+        """Start a server in a subprocess and wait until it answers; the context manager stops it."""
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        try:
+            process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=sys.stderr)
+        except FileNotFoundError:
+            raise CommandError(f"{command[0]} is not installed")
+
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urlopen(url, timeout=1)
+                break
+            except URLError as exc:
+                # Answering 401 without a token is enough to know it is up
+                if getattr(exc, "code", None) is not None:
+                    break
+            except OSError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise CommandError(f"{command[0]} did not start")
+            time.sleep(0.2)
+
+        stack = ExitStack()
+        stack.callback(process.wait, timeout=30)
+        stack.callback(process.terminate)
+        return stack
+
+    @staticmethod
+    async def load(url, token, options):
+        latencies, errors = [], 0
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        headers = {"Authorization": f"Bearer {token}"}
+        connector = aiohttp.TCPConnector(limit=options["concurrency"])
+
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+
+            async def fetch():
+                nonlocal errors
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        async with session.get(url) as response:
+                            await response.read()
+                            ok = response.status == 200
+                    except aiohttp.ClientError:
+                        ok = False
+                    if ok:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(fetch() for _ in range(options["requests"])))
+            elapsed = time.perf_counter() - started
+        return latencies, errors, elapsed
@@ -0,0 +1,54 @@
+import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.middleware import brotli
+from apps.common.renderers import FastJSONRenderer, orjson
+from apps.loans.serializers import LoanApplicationListSerializer
+
+from .benchmark_loan_serializer import build_loan_rows
+
+
+class Command(BaseCommand):
+    help = "Compare render time and response size of the stdlib and orjson JSON renderers for loan pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50, help="Loans per rendered page")
+        parser.add_argument("--repeat", type=int, default=500, help="Pages rendered per measurement")
+
+    def handle(self, *args, **options):
+        _, rows = build_loan_rows(options["rows"])
+        page = {
+            "count": options["rows"],
+            "next": "http://testserver/api/v1/loans/applications/?page=2",
+            "previous": None,
+            "results": LoanApplicationListSerializer(rows, many=True).data,
+        }
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer uses the stdlib"))
+
+        timings = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            name = type(renderer).__name__
+            timings[name] = timeit.timeit(lambda: renderer.render(page), number=options["repeat"])
+            per_page = timings[name] / options["repeat"] * 1000
+            self.stdout.write(f"{name}: {per_page:.3f} ms per page of {options['rows']} row(s)")
+
+        if FastJSONRenderer().render(page) != JSONRenderer().render(page):
+            self.stderr.write(self.style.ERROR("Renderers produced different bytes"))
+            return
+
+        body = FastJSONRenderer().render(page)
+        self.stdout.write(f"Identity: {len(body)} bytes")
+        self.stdout.write(f"gzip: {len(compress_string(body))} bytes")
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+            self.stdout.write(f"brotli (quality {settings.RESPONSE_BROTLI_QUALITY}): {len(compressed)} bytes")
+        else:
+            self.stdout.write("brotli: not installed")
+
+        speedup = timings["JSONRenderer"] / timings["FastJSONRenderer"]
+        self.stdout.write(self.style.SUCCESS(f"FastJSONRenderer is {speedup:.1f}x faster with identical output"))
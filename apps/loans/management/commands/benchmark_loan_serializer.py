@@ -0,0 +1,73 @@
+import timeit
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.loans.models import LoanApplication, LoanStatus
+from apps.loans.serializers import LoanApplicationListSerializer, LoanApplicationSerializer
+
+User = get_user_model()
+
+
+def build_loan_rows(count):
+    """In-memory loans and the matching values() rows, for benchmarks"""
+    now = timezone.now()
+    user = User(email="benchmark@example.com", username="benchmark")
+    loans, rows = [], []
+    for number in range(1, count + 1):
+        reasons = ["High loan amount"] if number % 5 == 0 else []
+        loan = LoanApplication(
+            pkid=number,
+            id=uuid.uuid4(),
+            user=user,
+            amount_requested=Decimal("1250000.50") + number,
+            purpose="Working capital for inventory",
+            status=LoanStatus.FLAGGED if reasons else LoanStatus.PENDING,
+            date_applied=now,
+            date_updated=now,
+            flag_reasons=reasons,
+            flag_count=len(reasons),
+        )
+        loans.append(loan)
+        # The same row as LoanApplication.objects.values(*value_fields) would return
+        rows.append({
+            field: user.email if field == "user__email" else getattr(loan, field)
+            for field in LoanApplicationListSerializer.value_fields
+        })
+    return loans, rows
+
+
+class Command(BaseCommand):
+    help = "Compare LoanApplicationSerializer with the values() list fast path on in-memory rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50, help="Loans per rendered page")
+        parser.add_argument("--repeat", type=int, default=200, help="Pages rendered per measurement")
+
+    def handle(self, *args, **options):
+        loans, rows = build_loan_rows(options["rows"])
+        renderer = JSONRenderer()
+        model_body = renderer.render(LoanApplicationSerializer(loans, many=True).data)
+        fast_body = renderer.render(LoanApplicationListSerializer(rows, many=True).data)
+        if model_body != fast_body:
+            self.stderr.write(self.style.ERROR("Fast path output differs from LoanApplicationSerializer"))
+            return
+
+        timings = {
+            "LoanApplicationSerializer": timeit.timeit(
+                lambda: renderer.render(LoanApplicationSerializer(loans, many=True).data), number=options["repeat"]
+            ),
+            "LoanApplicationListSerializer": timeit.timeit(
+                lambda: renderer.render(LoanApplicationListSerializer(rows, many=True).data), number=options["repeat"]
+            ),
+        }
+        for name, seconds in timings.items():
+            per_page = seconds / options["repeat"] * 1000
+            self.stdout.write(f"{name}: {per_page:.3f} ms per page of {options['rows']} row(s)")
+
+        speedup = timings["LoanApplicationSerializer"] / timings["LoanApplicationListSerializer"]
+        self.stdout.write(self.style.SUCCESS(f"Fast path is {speedup:.1f}x faster with identical output"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.loans.models import LoanApplication
+
+
+class Command(BaseCommand):
+    help = "Report loan applications whose flag_reasons/flag_count disagree with their FraudFlag rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Loans checked per pkid range")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pkid = LoanApplication.objects.order_by("-pkid").values_list("pkid", flat=True).first() or 0
+
+        drifted = 0
+        for start in range(0, last_pkid, batch_size):
+            batch = LoanApplication.objects.filter(pkid__gt=start, pkid__lte=start + batch_size)
+            for loan in batch.flag_summary_drift():
+                drifted += 1
+                self.stdout.write(f"{loan.id}: expected {loan.flag_count} flag(s) {loan.flag_reasons}")
+
+        if drifted:
+            raise CommandError(f"{drifted} loan application(s) have a stale flag summary; run backfill_flag_summary")
+        self.stdout.write(self.style.SUCCESS("Flag summaries are consistent"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.loans.stats import LoanStatsService
+
+
+class Command(BaseCommand):
+    help = "Recompute the LoanDailyStats rollup from LoanApplication and FraudFlag rows"
+
+    def handle(self, *args, **options):
+        rows = LoanStatsService.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} loan daily stats row(s)"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.loans.velocity import LoanVelocityService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis loan velocity counters from LoanApplication rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, dest="user_pk", help="Only rebuild counters for this user pkid")
+
+    def handle(self, *args, **options):
+        recent = LoanVelocityService.recent_loans().order_by()
+        if options["user_pk"] is not None:
+            recent = recent.filter(user_id=options["user_pk"])
+            user_pks = [options["user_pk"]]
+        else:
+            user_pks = recent.values_list("user_id", flat=True).distinct()
+
+        rebuilt = failed = 0
+        for user_pk in user_pks:
+            if LoanVelocityService.rebuild_user(user_pk):
+                rebuilt += 1
+            else:
+                failed += 1
+
+        if failed:
+            self.stderr.write(self.style.WARNING(f"Could not rebuild velocity counters for {failed} user(s)"))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt velocity counters for {rebuilt} user(s)"))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_loans_checked(apps, schema_editor):
+    # Loans created before this migration went through the synchronous check
+    LoanApplication = apps.get_model("loans", "LoanApplication")
+    LoanApplication.objects.filter(fraud_checked_at__isnull=True).update(
+        fraud_checked_at=F("date_applied")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0002_add_loan_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loanapplication",
+            name="fraud_checked_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="loanapplication",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="loanapplication",
+            constraint=models.UniqueConstraint(
+                fields=("user", "idempotency_key"), name="unique_loan_idempotency_key"
+            ),
+        ),
+        migrations.RunPython(mark_existing_loans_checked, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:24
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def seed_loan_daily_stats(apps, schema_editor):
+    # Same GROUP BYs as LoanStatsService.rebuild(), which later deltas build on
+    LoanApplication = apps.get_model("loans", "LoanApplication")
+    FraudFlag = apps.get_model("loans", "FraudFlag")
+    LoanDailyStats = apps.get_model("loans", "LoanDailyStats")
+
+    totals = (
+        LoanApplication.objects.annotate(day=TruncDate("date_applied"))
+        .values("day", "status")
+        .annotate(loans=Count("pkid"), amount=Sum("amount_requested"))
+        .order_by()
+    )
+    flags = (
+        FraudFlag.objects.annotate(
+            day=TruncDate("loan_application__date_applied"),
+            status=F("loan_application__status"),
+        )
+        .values("day", "status", "reason")
+        .annotate(flags=Count("pkid"), amount=Sum("loan_application__amount_requested"))
+        .order_by()
+    )
+
+    rows = [
+        LoanDailyStats(
+            day=row["day"],
+            status=row["status"],
+            loan_count=row["loans"],
+            amount_total=row["amount"],
+        )
+        for row in totals
+    ] + [
+        LoanDailyStats(
+            day=row["day"],
+            status=row["status"],
+            flag_reason=row["reason"],
+            loan_count=row["flags"],
+            amount_total=row["amount"],
+        )
+        for row in flags
+    ]
+    LoanDailyStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0003_loan_fraud_check_and_idempotency"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoanDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(db_index=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("approved", "Approved"),
+                            ("rejected", "Rejected"),
+                            ("flagged", "Flagged"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "flag_reason",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                ("loan_count", models.IntegerField(default=0)),
+                (
+                    "amount_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=18),
+                ),
+            ],
+            options={
+                "verbose_name": "Loan Daily Stats",
+                "verbose_name_plural": "Loan Daily Stats",
+                "ordering": ["-day", "status", "flag_reason"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "status", "flag_reason"),
+                        name="unique_loan_daily_stats",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(seed_loan_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+def backfill_flag_summary(apps, schema_editor):
+    LoanApplication = apps.get_model("loans", "LoanApplication")
+    FraudFlag = apps.get_model("loans", "FraudFlag")
+
+    reasons = {}
+    flags = FraudFlag.objects.order_by("loan_application_id", "pkid").values_list(
+        "loan_application_id", "reason"
+    )
+    for loan_pk, reason in flags.iterator(chunk_size=2000):
+        reasons.setdefault(loan_pk, []).append(reason)
+
+    loans = []
+    for loan in LoanApplication.objects.filter(pkid__in=list(reasons)).only("pkid"):
+        loan.flag_reasons = reasons[loan.pkid]
+        loan.flag_count = len(loan.flag_reasons)
+        loans.append(loan)
+    LoanApplication.objects.bulk_update(
+        loans, ["flag_reasons", "flag_count"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0004_loan_daily_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loanapplication",
+            name="flag_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="loanapplication",
+            name="flag_reasons",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_flag_summary, migrations.RunPython.noop),
+    ]
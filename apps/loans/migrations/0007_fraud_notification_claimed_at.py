@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0006_fraud_notification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fraudnotification",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,9 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from apps.common.models import TimeStampedModel
 
@@ -13,6 +17,48 @@ class LoanStatus(models.TextChoices):
     FLAGGED = 'flagged', _('Flagged')
 
 
+class LoanApplicationQuerySet(models.QuerySet):
+    # Columns read by the list serializers, pagination and __str__
+    listing_fields = [
+        'pkid', 'id', 'user', 'amount_requested', 'purpose', 'status',
+        'date_applied', 'date_updated', 'flag_reasons', 'flag_count',
+        'user__pkid', 'user__email', 'user__username',
+    ]
+
+    def with_related(self):
+        """Join the owner; flag reasons come from the denormalized columns."""
+        return self.select_related('user')
+
+    def for_listing(self):
+        """Read-only list path: a single query per page whatever its size."""
+        return self.with_related().only(*self.listing_fields)
+
+    def flag_summary_drift(self):
+        """Yield loans whose flag_reasons/flag_count disagree with their FraudFlag rows, corrected in memory."""
+        reasons = {}
+        flags = FraudFlag.objects.filter(loan_application__in=self.values('pkid')).order_by(
+            'loan_application_id', 'pkid'
+        ).values_list('loan_application_id', 'reason')
+        for loan_pk, reason in flags.iterator(chunk_size=2000):
+            reasons.setdefault(loan_pk, []).append(reason)
+
+        for loan in self.only('pkid', 'id', 'flag_reasons', 'flag_count').iterator(chunk_size=2000):
+            expected = reasons.get(loan.pkid, [])
+            if loan.flag_reasons != expected or loan.flag_count != len(expected):
+                loan.flag_reasons, loan.flag_count = expected, len(expected)
+                yield loan
+
+    def sync_flag_summary(self):
+        """Rewrite the flag summary of drifted loans; returns how many were fixed."""
+        loans = list(self.flag_summary_drift())
+        # bulk_update() skips auto_now, and the flags are part of the loan's representation
+        now = timezone.now()
+        for loan in loans:
+            loan.date_updated = now
+        self.model.objects.bulk_update(loans, ['flag_reasons', 'flag_count', 'date_updated'], batch_size=1000)
+        return len(loans)
+
+
 class LoanApplication(TimeStampedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='loan_applications', db_index=True)
     amount_requested = models.DecimalField(max_digits=12, decimal_places=2, db_index=True)
@@ -20,9 +66,19 @@ class LoanApplication(TimeStampedModel):
     status = models.CharField(max_length=20, choices=LoanStatus.choices, default=LoanStatus.PENDING, db_index=True)
     date_applied = models.DateTimeField(auto_now_add=True, db_index=True)
     date_updated = models.DateTimeField(auto_now=True, db_index=True)
+    fraud_checked_at = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True, editable=False)
+    # Denormalized from FraudFlag so listings need no join or prefetch
+    flag_reasons = models.JSONField(default=list, blank=True, editable=False)
+    flag_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = LoanApplicationQuerySet.as_manager()
 
     class Meta:
         ordering = ['-date_applied']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_loan_idempotency_key'),
+        ]
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['user', 'date_applied']),
@@ -36,6 +92,13 @@ class LoanApplication(TimeStampedModel):
     def __str__(self):
         return f"{self.user.username} - {self.amount_requested}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so the daily stats can move the loan on change
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
 
 class FraudFlag(TimeStampedModel):
     loan_application = models.ForeignKey(LoanApplication, on_delete=models.CASCADE, related_name='fraud_flags', db_index=True)
@@ -50,3 +113,69 @@ class FraudFlag(TimeStampedModel):
 
     def __str__(self):
         return f"Flag: {self.reason}"
+
+
+class FraudNotificationQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(sent_at__isnull=True)
+
+    def claimable(self):
+        """Pending notifications no sender holds, or whose sender's claim expired."""
+        expired = timezone.now() - timedelta(seconds=settings.FRAUD_NOTIFICATION_CLAIM_TIMEOUT)
+        return self.pending().filter(models.Q(claimed_at__isnull=True) | models.Q(claimed_at__lt=expired))
+
+
+class FraudNotification(TimeStampedModel):
+    """
+    A flagged loan waiting to be reported to the admins.
+
+    Written in the same transaction as the flag, then sent on its own while
+    few are pending or folded into the next digest during a burst; see
+    ``apps.loans.notifications``.
+    """
+    loan_application = models.ForeignKey(
+        LoanApplication, on_delete=models.CASCADE, related_name='fraud_notifications'
+    )
+    reasons = models.JSONField(default=list)
+    # Set while a sender mails it; a sender that died leaves it to be claimed again
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = FraudNotificationQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at'], condition=models.Q(sent_at__isnull=True), name='fraud_notification_pending'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Notification: {self.loan_application_id} ({'sent' if self.sent_at else 'pending'})"
+
+
+class LoanDailyStats(models.Model):
+    """
+    Portfolio rollup per application day, status and fraud flag reason.
+
+    Rows with an empty ``flag_reason`` count every loan of that day and
+    status; rows with a reason count the fraud flags carrying it. Kept up to
+    date by ``apps.loans.stats.LoanStatsService``.
+    """
+    day = models.DateField(db_index=True)
+    status = models.CharField(max_length=20, choices=LoanStatus.choices)
+    flag_reason = models.CharField(max_length=255, blank=True, default='')
+    loan_count = models.IntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('Loan Daily Stats')
+        verbose_name_plural = _('Loan Daily Stats')
+        ordering = ['-day', 'status', 'flag_reason']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status', 'flag_reason'], name='unique_loan_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status} {self.flag_reason or 'all'}: {self.loan_count}"
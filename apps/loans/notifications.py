@@ -0,0 +1,149 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.common.outbox import TaskOutbox
+
+from .models import FraudNotification
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+class FraudNotificationService:
+    """
+    Admin emails for flagged loans.
+
+    Flags are recorded as FraudNotification rows with the flag itself. While
+    few are pending each one is mailed right away; past
+    FRAUD_NOTIFICATION_IMMEDIATE_LIMIT they wait for the periodic digest, so a
+    fraud burst costs one SMTP session per digest instead of one per loan.
+    """
+
+    @staticmethod
+    def recipients():
+        emails = list(
+            User.objects.filter(is_staff=True, is_active=True).exclude(email='')
+            .order_by('email').values_list('email', flat=True)
+        )
+        return emails or list(settings.FRAUD_NOTIFICATION_FALLBACK_RECIPIENTS)
+
+    @staticmethod
+    def enqueue(loans_with_reasons):
+        """Record notifications for ``(loan, reasons)`` pairs; call inside the transaction that flags them."""
+        from .tasks import send_fraud_notification_digest, send_fraud_notification_email
+
+        notifications = FraudNotification.objects.bulk_create([
+            FraudNotification(loan_application=loan, reasons=list(reasons))
+            for loan, reasons in loans_with_reasons
+        ])
+        if not notifications:
+            return notifications
+
+        limit = settings.FRAUD_NOTIFICATION_IMMEDIATE_LIMIT
+        # Only whether the backlog is past the limit matters, so never count all of it
+        if FraudNotification.objects.pending().order_by()[limit:limit + 1].exists():
+            logger.info(f"Fraud notifications deferred to digest - Pending: more than {limit}")
+        elif len(notifications) == 1:
+            TaskOutbox.enqueue(send_fraud_notification_email, str(notifications[0].id))
+        else:
+            TaskOutbox.enqueue(send_fraud_notification_digest)
+        return notifications
+
+    @staticmethod
+    def send(notifications, template, subject, connection=None, recipients=None):
+        """Mail ``notifications`` to every admin over ``connection``, or a single new SMTP connection."""
+        body = render_to_string(template, {'notifications': notifications, 'notification': notifications[0]})
+        messages = [
+            EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient])
+            for recipient in recipients or FraudNotificationService.recipients()
+        ]
+        if connection is not None:
+            return connection.send_messages(messages)
+        with get_connection(fail_silently=False) as connection:
+            return connection.send_messages(messages)
+
+    @staticmethod
+    def mark_sent(notifications):
+        FraudNotification.objects.filter(pkid__in=[n.pkid for n in notifications]).update(sent_at=timezone.now())
+
+    @staticmethod
+    def release(notifications):
+        """Hand claimed ``notifications`` back to the next sender right away."""
+        FraudNotification.objects.filter(pkid__in=[n.pkid for n in notifications]).update(claimed_at=None)
+
+    @staticmethod
+    def send_one(notification_id):
+        """Mail a single notification unless a digest already took it; returns whether it was sent."""
+        claimed = FraudNotification.objects.claimable().filter(id=notification_id).update(claimed_at=timezone.now())
+        if not claimed:
+            return False
+        notification = FraudNotification.objects.select_related('loan_application__user').get(id=notification_id)
+        try:
+            FraudNotificationService.send(
+                [notification],
+                'loans/email/fraud_flagged.txt',
+                f"Loan Application Flagged - {notification.loan_application.id}",
+            )
+        except Exception:
+            # Leave it to the next digest
+            FraudNotificationService.release([notification])
+            raise
+        FraudNotificationService.mark_sent([notification])
+        return True
+
+    @staticmethod
+    def claim_batch():
+        """
+        Claim up to FRAUD_NOTIFICATION_BATCH_SIZE claimable notifications and
+        return them. The row locks last only for this short transaction, never
+        for the SMTP session; concurrent digests claim disjoint batches. Claims
+        of a sender that dies before marking its batch sent expire after
+        FRAUD_NOTIFICATION_CLAIM_TIMEOUT, so the batch is mailed again rather
+        than lost.
+        """
+        with transaction.atomic():
+            notifications = list(
+                FraudNotification.objects.claimable()
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('loan_application__user')
+                .order_by('created_at')[:settings.FRAUD_NOTIFICATION_BATCH_SIZE]
+            )
+            if notifications:
+                FraudNotification.objects.filter(pkid__in=[n.pkid for n in notifications]).update(
+                    claimed_at=timezone.now()
+                )
+        return notifications
+
+    @staticmethod
+    def send_digest():
+        """Mail every pending notification in digests of FRAUD_NOTIFICATION_BATCH_SIZE; returns how many."""
+        notifications = FraudNotificationService.claim_batch()
+        if not notifications:
+            return 0
+
+        sent = 0
+        recipients = FraudNotificationService.recipients()
+        with get_connection(fail_silently=False) as connection:
+            while notifications:
+                try:
+                    FraudNotificationService.send(
+                        notifications,
+                        'loans/email/fraud_digest.txt',
+                        f"Loan Applications Flagged - {len(notifications)} application(s)",
+                        connection=connection,
+                        recipients=recipients,
+                    )
+                except Exception:
+                    FraudNotificationService.release(notifications)
+                    raise
+                FraudNotificationService.mark_sent(notifications)
+                sent += len(notifications)
+                logger.info(f"Fraud notification digest sent - Count: {len(notifications)}")
+                notifications = FraudNotificationService.claim_batch()
+        return sent
@@ -1,7 +1,194 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class LoanPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
+
+
+class LoanCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(<ordering field>, pkid)``.
+
+    Each page is fetched with a range condition on the ordering column instead
+    of an OFFSET and no COUNT(*) is issued, so the cost of a page does not grow
+    with its depth. The ordering chosen through ``OrderingFilter`` is honored
+    as long as it is one of ``ordering_fields``.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    ordering_fields = ("date_applied", "amount_requested")
+    default_ordering = "-date_applied"
+    tiebreaker = "pkid"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        current = [str(field) for field in queryset.query.order_by]
+        if current and current[0].lstrip("-") in self.ordering_fields:
+            return current[0]
+        return self.default_ordering
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            model_field = self.model._meta.get_field(field)
+            return {
+                "field": cursor["f"],
+                "value": model_field.to_python(cursor["v"]),
+                "pkid": int(cursor["k"]),
+                "reverse": bool(cursor.get("r")),
+            }
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def get_value(obj, field):
+        # Pages hold model instances or, on the read-only fast path, values() dicts
+        return obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+    def encode_cursor(self, obj, reverse):
+        value = self.get_value(obj, self.field)
+        payload = {
+            "f": self.ordering,
+            "v": value.isoformat() if hasattr(value, "isoformat") else str(value),
+            "k": self.get_value(obj, self.tiebreaker),
+        }
+        if reverse:
+            payload["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("ascii"))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode("ascii"))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """The rows of the requested page plus one, which tells whether there are more."""
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.field = self.ordering.lstrip("-")
+        self.base_url = request.build_absolute_uri()
+
+        cursor = self.decode_cursor(request, self.field)
+        if cursor is not None and cursor["field"] != self.ordering:
+            raise NotFound(self.invalid_cursor_message)
+        reverse = bool(cursor and cursor["reverse"])
+
+        # Walking backwards flips the direction and the results are reversed below
+        descending = self.ordering.startswith("-") != reverse
+        prefix, lookup = ("-", "lt") if descending else ("", "gt")
+        queryset = queryset.order_by(f"{prefix}{self.field}", f"{prefix}{self.tiebreaker}")
+
+        if cursor is not None:
+            bound = "lte" if lookup == "lt" else "gte"
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{bound}": cursor["value"]})
+                & (
+                    Q(**{f"{self.field}__{lookup}": cursor["value"]})
+                    | Q(**{self.field: cursor["value"], f"{self.tiebreaker}__{lookup}": cursor["pkid"]})
+                )
+            )
+
+        self.cursor = cursor
+        return queryset[: self.page_size + 1]
+
+    def paginate_rows(self, results):
+        """The page out of the rows fetched with ``page_queryset()``."""
+        cursor = self.cursor
+        reverse = bool(cursor and cursor["reverse"])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.page = results
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class LoanPaginationMixin:
+    """
+    Picks page-number or cursor pagination per request.
+
+    ``?pagination=cursor`` (or any ``cursor`` parameter) selects keyset
+    pagination and ``?pagination=page`` page numbers; without either the
+    ``LOAN_PAGINATION_MODE`` setting decides.
+    """
+
+    pagination_modes = {
+        "page": LoanPagination,
+        "cursor": LoanCursorPagination,
+    }
+
+    @classmethod
+    def get_pagination_class(cls, query_params):
+        mode = query_params.get("pagination")
+        if mode not in cls.pagination_modes:
+            if LoanCursorPagination.cursor_query_param in query_params:
+                mode = "cursor"
+            else:
+                mode = settings.LOAN_PAGINATION_MODE
+        return cls.pagination_modes[mode]
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            self._paginator = self.get_pagination_class(self.request.query_params)()
+        return self._paginator
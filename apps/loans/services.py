@@ -1,10 +1,13 @@
 import logging
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.core.cache import cache
-from datetime import timedelta
+from django.db import transaction
+from .caching import invalidate_loan_lists
 from .models import LoanApplication, FraudFlag, LoanStatus
-from .tasks import send_fraud_notification_email
+from .fraud_rules import FraudRuleEngine, FraudSubject
+from .notifications import FraudNotificationService
+from .stats import LoanStatsService
+from .velocity import LoanVelocityService
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -13,69 +16,101 @@ logger = logging.getLogger(__name__)
 class FraudDetectionService:
     @staticmethod
     def check_fraud(user, amount_requested):
-        flags = []
         logger.info(f"Running fraud detection - User: {user.id}, Amount: {amount_requested}")
-        
-        # Check 1: More than 3 loans in past 24 hours (optimized with index)
-        yesterday = timezone.now() - timedelta(hours=24)
-        recent_loans = LoanApplication.objects.filter(
-            user=user, 
-            date_applied__gte=yesterday
-        ).count()
-        
-        if recent_loans >= 3:
-            flag = "User submitted more than 3 loans in past 24 hours"
-            flags.append(flag)
-            logger.warning(f"Fraud flag: {flag} - User: {user.id}")
-        
-        # Check 2: Amount exceeds 5,000,000 NGN
-        if amount_requested > 5000000:
-            flag = "Requested amount exceeds NGN 5,000,000"
-            flags.append(flag)
-            logger.warning(f"Fraud flag: {flag} - User: {user.id}, Amount: {amount_requested}")
-        
-        # Check 3: Email domain used by more than 10 users (cached and optimized)
-        email_domain = user.email.split('@')[1]
-        cache_key = f"domain_users_{email_domain}"
-        domain_users = cache.get(cache_key)
-        
-        if domain_users is None:
-            # Optimized query using email index
-            domain_users = User.objects.filter(
-                email__endswith=f'@{email_domain}',
-                is_active=True
-            ).count()
-            cache.set(cache_key, domain_users, timeout=3600)
-        
-        if domain_users > 10:
-            flag = "Email domain used by more than 10 users"
-            flags.append(flag)
-            logger.warning(f"Fraud flag: {flag} - User: {user.id}, Domain: {email_domain}")
-        
+        flags = FraudRuleEngine().evaluate(FraudSubject(user, amount_requested))
         logger.info(f"Fraud detection completed - User: {user.id}, Flags: {len(flags)}")
         return flags
 
+    @staticmethod
+    def process_loan(loan_application):
+        """Run the fraud rules for a saved loan, flag it if needed and mark it checked."""
+        fraud_reasons = FraudDetectionService.check_fraud(
+            loan_application.user,
+            loan_application.amount_requested
+        )
+        loan_application.fraud_checked_at = timezone.now()
+
+        if fraud_reasons:
+            FraudDetectionService.flag_loan(loan_application, fraud_reasons)
+            logger.warning(f"Loan flagged for fraud - ID: {loan_application.id}, Reasons: {fraud_reasons}")
+        else:
+            loan_application.save(update_fields=['fraud_checked_at', 'date_updated', 'updated_at'])
+        return fraud_reasons
+
     @staticmethod
     def flag_loan(loan_application, reasons):
-        loan_application.status = LoanStatus.FLAGGED
-        loan_application.save(update_fields=['status', 'updated_at'])
-        
-        # Bulk create fraud flags for better performance
-        fraud_flags = [
-            FraudFlag(loan_application=loan_application, reason=reason)
-            for reason in reasons
-        ]
-        FraudFlag.objects.bulk_create(fraud_flags)
+        with transaction.atomic():
+            # Lock the row so concurrent flags append to the summary instead of overwriting it
+            current_reasons = LoanApplication.objects.select_for_update().values_list(
+                'flag_reasons', flat=True
+            ).get(pk=loan_application.pk)
+            loan_application.flag_reasons = list(current_reasons) + list(reasons)
+            loan_application.flag_count = len(loan_application.flag_reasons)
+            loan_application.status = LoanStatus.FLAGGED
+            update_fields = ['status', 'flag_reasons', 'flag_count', 'date_updated', 'updated_at']
+            if loan_application.fraud_checked_at is not None:
+                update_fields.append('fraud_checked_at')
+            loan_application.save(update_fields=update_fields)
+
+            # Bulk create fraud flags for better performance
+            fraud_flags = [
+                FraudFlag(loan_application=loan_application, reason=reason)
+                for reason in reasons
+            ]
+            FraudFlag.objects.bulk_create(fraud_flags)
+            LoanStatsService.record_flags(loan_application, reasons)
+            # Published with the flag's commit, so a rolled back flag never reaches the admins
+            FraudNotificationService.enqueue([(loan_application, reasons)])
         
         logger.error(f"Loan flagged - ID: {loan_application.id}, User: {loan_application.user.id}, Reasons: {reasons}")
-        
-        # Clear flagged loans cache
-        cache.delete("flagged_loans_list")
-        
-        # Queue email notification
-        send_fraud_notification_email.delay(
-            str(loan_application.id),
-            loan_application.user.email,
-            str(loan_application.amount_requested),
-            reasons
-        )
+
+
+class BulkLoanSubmissionService:
+    @staticmethod
+    def submit(user, validated_data, ip_address=None):
+        """
+        Create many loan applications for ``user`` at once.
+
+        Fraud rules are evaluated for the whole batch before inserting, so
+        flagged loans are written with their final status and the batch costs
+        a fixed number of queries regardless of its size.
+        """
+        subjects = [
+            FraudSubject(user, item['amount_requested'], pending_loans=position)
+            for position, item in enumerate(validated_data, start=1)
+        ]
+        logger.info(f"Running batch fraud detection - User: {user.id}, Loans: {len(subjects)}")
+        batch_reasons = FraudRuleEngine().evaluate_many(subjects)
+
+        checked_at = timezone.now()
+        loans = [
+            LoanApplication(
+                user=user,
+                fraud_checked_at=checked_at,
+                status=LoanStatus.FLAGGED if reasons else LoanStatus.PENDING,
+                flag_reasons=reasons,
+                flag_count=len(reasons),
+                **item
+            )
+            for item, reasons in zip(validated_data, batch_reasons)
+        ]
+
+        with transaction.atomic():
+            LoanApplication.objects.bulk_create(loans)
+            FraudFlag.objects.bulk_create([
+                FraudFlag(loan_application=loan, reason=reason)
+                for loan, reasons in zip(loans, batch_reasons)
+                for reason in reasons
+            ])
+            FraudNotificationService.enqueue([
+                (loan, reasons) for loan, reasons in zip(loans, batch_reasons) if reasons
+            ])
+
+        # bulk_create sends no post_save signals
+        invalidate_loan_lists(user.pk)
+        LoanStatsService.record_loans(zip(loans, batch_reasons))
+        LoanVelocityService.record_many(loans, ip_address=ip_address)
+
+        flagged = sum(1 for reasons in batch_reasons if reasons)
+        logger.info(f"Bulk loan submission completed - User: {user.id}, Loans: {len(loans)}, Flagged: {flagged}")
+        return loans, batch_reasons
@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_loan_lists
+from .models import FraudFlag, LoanApplication
+from .stats import LoanStatsService
+
+
+def flag_loan_of(flag, origin=None):
+    """
+    The loan of ``flag`` for the handlers below, fetched at most once per flag.
+
+    A flag deleted along with its loan gets the loan being deleted; otherwise
+    the columns the handlers read are loaded into the flag's relation cache,
+    where every following handler finds them.
+    """
+    if isinstance(origin, LoanApplication) and origin.pk == flag.loan_application_id:
+        return origin
+    if not FraudFlag.loan_application.is_cached(flag):
+        flag.loan_application = LoanApplication.objects.only(
+            'user_id', 'status', 'amount_requested', 'date_applied'
+        ).get(pk=flag.loan_application_id)
+    return flag.loan_application
+
+
+@receiver(post_save, sender=LoanApplication)
+@receiver(post_delete, sender=LoanApplication)
+def invalidate_loan_lists_on_loan_change(sender, instance, **kwargs):
+    invalidate_loan_lists(instance.user_id)
+
+
+@receiver(post_save, sender=FraudFlag)
+@receiver(post_delete, sender=FraudFlag)
+def invalidate_loan_lists_on_flag_change(sender, instance, origin=None, **kwargs):
+    invalidate_loan_lists(flag_loan_of(instance, origin).user_id)
+
+
+@receiver(post_save, sender=LoanApplication)
+def update_daily_stats_on_loan_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        LoanStatsService.record_loans([(instance, [])])
+    else:
+        LoanStatsService.record_status_change(instance, getattr(instance, '_loaded_status', instance.status))
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=LoanApplication)
+def update_daily_stats_on_loan_delete(sender, instance, **kwargs):
+    # Flag rows are removed by the FraudFlag post_delete sent for the cascade
+    instance.status = getattr(instance, '_loaded_status', instance.status)
+    LoanStatsService.record_loans([(instance, [])], sign=-1)
+
+
+@receiver(post_save, sender=FraudFlag)
+def update_daily_stats_on_flag_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        LoanStatsService.record_flags(flag_loan_of(instance), [instance.reason])
+
+
+@receiver(post_delete, sender=FraudFlag)
+def update_daily_stats_on_flag_delete(sender, instance, origin=None, **kwargs):
+    LoanStatsService.record_flags(flag_loan_of(instance, origin), [instance.reason], sign=-1)
+
+
+@receiver(post_save, sender=FraudFlag)
+@receiver(post_delete, sender=FraudFlag)
+def sync_flag_summary_on_flag_change(sender, instance, raw=False, origin=None, **kwargs):
+    # flag_loan() maintains the summary itself; this covers flags saved or deleted one by one
+    if raw or isinstance(origin, LoanApplication):
+        return
+    LoanApplication.objects.filter(pk=instance.loan_application_id).sync_flag_summary()
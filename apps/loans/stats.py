@@ -0,0 +1,149 @@
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.common.cache import bump_generation
+
+from .models import FraudFlag, LoanApplication, LoanDailyStats
+
+logger = logging.getLogger(__name__)
+
+STATS_SCOPE = "loans:stats"
+
+
+class LoanStatsService:
+    """
+    Incremental maintenance of ``LoanDailyStats``.
+
+    Every change is expressed as deltas keyed by ``(day, status, reason)``
+    and applied with ``F()`` updates, so concurrent writers never overwrite
+    each other and a batch touches one row per distinct key.
+
+    The cached stats endpoint is only invalidated when a bucket is created or
+    loans move between statuses; plain count changes, such as every new
+    submission, show up once the cached response expires.
+    """
+
+    @staticmethod
+    def day_of(loan):
+        return timezone.localdate(loan.date_applied)
+
+    @staticmethod
+    def apply(deltas, invalidate=False):
+        deltas = {key: value for key, value in deltas.items() if value[0] or value[1]}
+        if not deltas:
+            return
+        with transaction.atomic():
+            for (day, status, reason), (count, amount) in deltas.items():
+                lookup = {'day': day, 'status': status, 'flag_reason': reason}
+                updated = LoanDailyStats.objects.filter(**lookup).update(
+                    loan_count=F('loan_count') + count,
+                    amount_total=F('amount_total') + amount,
+                )
+                if not updated:
+                    _, created = LoanDailyStats.objects.get_or_create(
+                        **lookup, defaults={'loan_count': count, 'amount_total': amount}
+                    )
+                    if created:
+                        invalidate = True
+                    else:
+                        LoanDailyStats.objects.filter(**lookup).update(
+                            loan_count=F('loan_count') + count,
+                            amount_total=F('amount_total') + amount,
+                        )
+        if invalidate:
+            bump_generation(STATS_SCOPE)
+
+    @staticmethod
+    def _add(deltas, key, count, amount):
+        current = deltas.setdefault(key, [0, Decimal('0')])
+        current[0] += count
+        current[1] += amount
+
+    @staticmethod
+    def record_loans(loans_with_reasons, sign=1):
+        """Add (or with ``sign=-1`` remove) loans and the given flag reasons."""
+        deltas = {}
+        for loan, reasons in loans_with_reasons:
+            day = LoanStatsService.day_of(loan)
+            LoanStatsService._add(deltas, (day, loan.status, ''), sign, sign * loan.amount_requested)
+            for reason in reasons:
+                LoanStatsService._add(deltas, (day, loan.status, reason), sign, sign * loan.amount_requested)
+        LoanStatsService.apply(deltas)
+
+    @staticmethod
+    def record_flags(loan, reasons, sign=1):
+        deltas = {}
+        day = LoanStatsService.day_of(loan)
+        for reason in reasons:
+            LoanStatsService._add(deltas, (day, loan.status, reason), sign, sign * loan.amount_requested)
+        LoanStatsService.apply(deltas)
+
+    @staticmethod
+    def record_status_change(loan, old_status):
+        """Move a loan and its existing flags from ``old_status`` to its current status."""
+        if old_status == loan.status:
+            return
+        day = LoanStatsService.day_of(loan)
+        amount = loan.amount_requested
+        deltas = {}
+        reasons = [''] + list(FraudFlag.objects.filter(loan_application=loan).values_list('reason', flat=True))
+        for reason in reasons:
+            LoanStatsService._add(deltas, (day, old_status, reason), -1, -amount)
+            LoanStatsService._add(deltas, (day, loan.status, reason), 1, amount)
+        LoanStatsService.apply(deltas, invalidate=True)
+
+    @staticmethod
+    def record_queryset_status_change(queryset, new_status):
+        """Deltas for a ``queryset.update(status=...)``; call before the update."""
+        queryset = queryset.exclude(status=new_status).order_by()
+        deltas = {}
+        totals = queryset.annotate(day=TruncDate('date_applied')).values('day', 'status').annotate(
+            loans=Count('pkid'), amount=Sum('amount_requested')
+        )
+        for row in totals:
+            LoanStatsService._add(deltas, (row['day'], row['status'], ''), -row['loans'], -row['amount'])
+            LoanStatsService._add(deltas, (row['day'], new_status, ''), row['loans'], row['amount'])
+
+        flags = FraudFlag.objects.filter(loan_application__in=queryset.values('pkid')).annotate(
+            day=TruncDate('loan_application__date_applied'), status=F('loan_application__status')
+        ).values('day', 'status', 'reason').annotate(
+            flags=Count('pkid'), amount=Sum('loan_application__amount_requested')
+        ).order_by()
+        for row in flags:
+            LoanStatsService._add(deltas, (row['day'], row['status'], row['reason']), -row['flags'], -row['amount'])
+            LoanStatsService._add(deltas, (row['day'], new_status, row['reason']), row['flags'], row['amount'])
+        LoanStatsService.apply(deltas, invalidate=True)
+
+    @staticmethod
+    def rebuild():
+        """Recompute the whole rollup with two GROUP BY queries."""
+        totals = LoanApplication.objects.annotate(day=TruncDate('date_applied')).values('day', 'status').annotate(
+            loans=Count('pkid'), amount=Sum('amount_requested')
+        ).order_by()
+        flags = FraudFlag.objects.annotate(
+            day=TruncDate('loan_application__date_applied'), status=F('loan_application__status')
+        ).values('day', 'status', 'reason').annotate(
+            flags=Count('pkid'), amount=Sum('loan_application__amount_requested')
+        ).order_by()
+
+        rows = [
+            LoanDailyStats(day=row['day'], status=row['status'], loan_count=row['loans'], amount_total=row['amount'])
+            for row in totals
+        ] + [
+            LoanDailyStats(
+                day=row['day'], status=row['status'], flag_reason=row['reason'],
+                loan_count=row['flags'], amount_total=row['amount'],
+            )
+            for row in flags
+        ]
+        with transaction.atomic():
+            LoanDailyStats.objects.all().delete()
+            LoanDailyStats.objects.bulk_create(rows, batch_size=1000)
+        bump_generation(STATS_SCOPE)
+        logger.info(f"Loan daily stats rebuilt - Rows: {len(rows)}")
+        return len(rows)
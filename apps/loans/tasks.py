@@ -1,35 +1,67 @@
+from smtplib import SMTPException
+
 from celery import shared_task
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@shared_task(
+    autoretry_for=(SMTPException, OSError),
+    max_retries=settings.FRAUD_NOTIFICATION_MAX_RETRIES,
+    retry_backoff=settings.FRAUD_NOTIFICATION_RETRY_BACKOFF,
+    retry_backoff_max=settings.FRAUD_NOTIFICATION_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+)
+def send_fraud_notification_email(notification_id):
+    """Email the admins about one flagged loan, unless a digest already covered it; retried with backoff"""
+    from .notifications import FraudNotificationService
+
+    try:
+        sent = FraudNotificationService.send_one(notification_id)
+    except Exception as e:
+        logger.error(f"Failed to send admin notification - ID: {notification_id}, Error: {str(e)}")
+        raise
+    if not sent:
+        logger.info(f"Admin notification already sent - ID: {notification_id}")
+        return f"Notification {notification_id} already sent"
+    logger.info(f"Admin notification sent for flagged loan - ID: {notification_id}")
+    return f"Email sent for notification {notification_id}"
+
+
 @shared_task
-def send_fraud_notification_email(loan_id, user_email, amount, reasons):
-    """Send email notification to admin when loan is flagged"""
-    subject = f"Loan Application Flagged - {loan_id}"
-    message = f"""
-    A loan application has been flagged for review:
-    
-    User: {user_email}
-    Amount: NGN {amount}
-    Reasons: {', '.join(reasons)}
-    
-    Please review in the admin panel.
-    """
-    
+def send_fraud_notification_digest():
+    """Periodic digest of every pending fraud notification, also run right away for small bursts"""
+    from .notifications import FraudNotificationService
+
     try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            ['admin@example.com'],
-            fail_silently=False,
-        )
-        logger.info(f"Admin notification sent for flagged loan - ID: {loan_id}")
-        return f"Email sent for loan {loan_id}"
+        sent = FraudNotificationService.send_digest()
     except Exception as e:
-        logger.error(f"Failed to send admin notification - ID: {loan_id}, Error: {str(e)}")
+        logger.error(f"Failed to send fraud notification digest - Error: {str(e)}")
         raise
+    return f"Digest sent for {sent} notification(s)"
+
+
+@shared_task
+def run_fraud_checks(loan_id):
+    """Run fraud detection for a loan persisted in async mode; safe to run more than once"""
+    from .models import LoanApplication
+    from .services import FraudDetectionService
+
+    with transaction.atomic():
+        loan = (
+            LoanApplication.objects.select_for_update()
+            .select_related('user')
+            .filter(id=loan_id, fraud_checked_at__isnull=True)
+            .first()
+        )
+        if loan is None:
+            logger.info(f"Fraud check skipped, loan missing or already checked - ID: {loan_id}")
+            return f"Loan {loan_id} already checked"
+
+        reasons = FraudDetectionService.process_loan(loan)
+
+    logger.info(f"Async fraud check completed - ID: {loan_id}, Flags: {len(reasons)}")
+    return f"Loan {loan_id} checked with {len(reasons)} flag(s)"
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LoanApplicationViewSet, FlaggedLoansView
+from .views import LoanApplicationViewSet, FlaggedLoansView, LoanExportView, LoanStatsView
+from .async_views import AsyncFlaggedLoansView, AsyncLoanDetailView, AsyncLoanListView
 
 app_name = 'loans'
 
@@ -10,4 +11,9 @@ router.register('applications', LoanApplicationViewSet, basename='loan-applicati
 urlpatterns = [
     path('', include(router.urls)),
     path('flagged/', FlaggedLoansView.as_view(), name='flagged-loans'),
+    path('export/', LoanExportView.as_view(), name='loan-export'),
+    path('stats/', LoanStatsView.as_view(), name='loan-stats'),
+    path('async/applications/', AsyncLoanListView.as_view(), name='async-loan-applications-list'),
+    path('async/applications/<int:pk>/', AsyncLoanDetailView.as_view(), name='async-loan-applications-detail'),
+    path('async/flagged/', AsyncFlaggedLoansView.as_view(), name='async-flagged-loans'),
 ]
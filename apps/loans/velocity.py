@@ -0,0 +1,50 @@
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.common.velocity import SlidingWindowCounter
+
+from .models import LoanApplication
+
+logger = logging.getLogger(__name__)
+
+loan_velocity = SlidingWindowCounter("loans")
+
+
+def _events(queryset):
+    return (
+        (pkid, date_applied.timestamp())
+        for pkid, date_applied in queryset.order_by().values_list("pkid", "date_applied")
+    )
+
+
+class LoanVelocityService:
+    """Feeds and rebuilds the loan submission counters per user and client IP."""
+
+    @staticmethod
+    def recent_loans(**filters):
+        since = timezone.now() - timedelta(seconds=loan_velocity.retention)
+        return LoanApplication.objects.filter(date_applied__gte=since, **filters)
+
+    @staticmethod
+    def record(loan_application, ip_address=None):
+        LoanVelocityService.record_many([loan_application], ip_address=ip_address)
+
+    @staticmethod
+    def record_many(loan_applications, ip_address=None):
+        by_dimension = {}
+        for loan in loan_applications:
+            event = (loan.pkid, loan.date_applied.timestamp())
+            by_dimension.setdefault(("user", loan.user.pk), []).append(event)
+            if ip_address:
+                # No database column backs this dimension, so it is Redis-only
+                by_dimension.setdefault(("ip", ip_address), []).append(event)
+
+        for (dimension, identifier), events in by_dimension.items():
+            if loan_velocity.record_many(dimension, identifier, events) is False and dimension == "user":
+                LoanVelocityService.rebuild_user(identifier)
+
+    @staticmethod
+    def rebuild_user(user_pk):
+        return loan_velocity.rebuild("user", user_pk, _events(LoanVelocityService.recent_loans(user_id=user_pk)))
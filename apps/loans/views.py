@@ -1,35 +1,66 @@
 import logging
-from django.core.cache import cache
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 
-from .models import LoanApplication, LoanStatus
-from .serializers import LoanApplicationSerializer, AdminLoanApplicationSerializer
+from apps.common.cache import get_or_compute
+from apps.common.conditional import make_etag, not_modified_response, set_validators, versioned_etag
+from apps.common.outbox import TaskOutbox
+from apps.common.throttling import client_ip
+
+from .models import LoanApplication, LoanDailyStats, LoanStatus
+from .serializers import AdminLoanApplicationSerializer, LoanApplicationListSerializer, LoanApplicationSerializer
+from .caching import (
+    FLAGGED_LOANS_CACHE,
+    LOAN_LIST_CACHE,
+    LOAN_STATS_CACHE,
+    flagged_loans_cache_key,
+    loan_list_cache_key,
+    loan_stats_cache_key,
+)
+from .exports import LoanExportService
 from .permissions import IsOwnerOrAdmin, IsAdminUser
-from .services import FraudDetectionService
-from .paginations import LoanPagination
+from .services import BulkLoanSubmissionService, FraudDetectionService
+from .paginations import LoanPagination, LoanPaginationMixin
+from .tasks import run_fraud_checks
+from .velocity import LoanVelocityService
 
 logger = logging.getLogger(__name__)
 
 
-def safe_cache_delete_pattern(pattern):
-    """Safely delete cache pattern, handling DummyCache"""
-    try:
-        if hasattr(cache, 'delete_pattern'):
-            cache.delete_pattern(pattern)
-        else:
-            # For DummyCache or other backends without delete_pattern
-            pass
-    except AttributeError:
-        pass
+class LoanListFastPathMixin:
+    """
+    Serves list responses from ``values()`` rows through
+    ``LoanApplicationListSerializer`` instead of model instances; the JSON is
+    identical. ``LOAN_FAST_LIST_SERIALIZER = False`` falls back to the regular
+    serializer.
+    """
+
+    list_serializer_class = LoanApplicationListSerializer
+
+    def list(self, request, *args, **kwargs):
+        if not settings.LOAN_FAST_LIST_SERIALIZER:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*self.list_serializer_class.value_fields)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.list_serializer_class(page, many=True).data)
+        return Response(self.list_serializer_class(queryset, many=True).data)
 
 
-class LoanApplicationViewSet(ModelViewSet):
+class LoanApplicationViewSet(LoanPaginationMixin, LoanListFastPathMixin, ModelViewSet):
     serializer_class = LoanApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = LoanPagination
@@ -39,9 +70,13 @@ class LoanApplicationViewSet(ModelViewSet):
     ordering = ['-date_applied']
 
     def get_queryset(self):
-        if self.request.user.is_staff:
-            return LoanApplication.objects.all().prefetch_related('fraud_flags')
-        return LoanApplication.objects.filter(user=self.request.user).prefetch_related('fraud_flags')
+        queryset = LoanApplication.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        # Deferred columns would be skipped by save(), so only the read-only list defers them
+        if self.action == 'list':
+            return queryset.for_listing()
+        return queryset.with_related()
 
     def get_serializer_class(self):
         if self.request.user.is_staff and self.action in ['update', 'partial_update']:
@@ -51,7 +86,7 @@ class LoanApplicationViewSet(ModelViewSet):
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy', 'approve', 'reject', 'flag']:
             permission_classes = [IsAdminUser]
-        elif self.action in ['retrieve']:
+        elif self.action in ['retrieve', 'check_status']:
             permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -59,31 +94,130 @@ class LoanApplicationViewSet(ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def list(self, request, *args, **kwargs):
-        cache_key = f"loans_list_{request.user.id}_{request.query_params}"
-        cached_response = cache.get(cache_key)
-        
-        if cached_response:
-            logger.info(f"Cache hit for loans list - User: {request.user.id}")
-            return Response(cached_response)
-        
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=300)
-        logger.info(f"Loans list cached - User: {request.user.id}")
+        key = loan_list_cache_key(request)
+        etag = versioned_etag(key)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            logger.info(f"Loans list not modified - User: {request.user.id}")
+            return not_modified
+
+        list_page = super().list
+
+        def render():
+            data = list_page(request, *args, **kwargs).data
+            logger.info(f"Loans list cached - User: {request.user.id}")
+            return data
+
+        data = get_or_compute(key, render, timeout=300, name=LOAN_LIST_CACHE)
+        return set_validators(Response(data), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        loan = self.get_object()
+        etag = make_etag(loan.id, loan.date_updated.timestamp(), loan.user.email)
+        not_modified = not_modified_response(request, etag, loan.date_updated)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(self.get_serializer(loan).data), etag, loan.date_updated)
+
+    def get_idempotency_key(self):
+        idempotency_key = self.request.headers.get('Idempotency-Key') or None
+        max_length = LoanApplication._meta.get_field('idempotency_key').max_length
+        if idempotency_key and len(idempotency_key) > max_length:
+            raise ValidationError({'Idempotency-Key': [f'Ensure this value has at most {max_length} characters.']})
+        return idempotency_key
+
+    def create(self, request, *args, **kwargs):
+        idempotency_key = self.get_idempotency_key()
+        if idempotency_key:
+            existing = self.get_queryset().filter(user=request.user, idempotency_key=idempotency_key).first()
+            if existing is not None:
+                logger.info(f"Idempotent replay of loan application - ID: {existing.id}, User: {request.user.id}")
+                return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
+
+        try:
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+        except IntegrityError:
+            if not idempotency_key:
+                raise
+            # A concurrent request with the same key won the race
+            existing = self.get_queryset().get(user=request.user, idempotency_key=idempotency_key)
+            return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
+
+        if settings.FRAUD_CHECK_ASYNC:
+            response.status_code = status.HTTP_202_ACCEPTED
         return response
 
     def perform_create(self, serializer):
-        loan_application = serializer.save()
+        loan_application = serializer.save(idempotency_key=self.get_idempotency_key())
         logger.info(f"Loan application created - ID: {loan_application.id}, User: {loan_application.user.id}, Amount: {loan_application.amount_requested}")
-        
-        # Run fraud detection
-        fraud_reasons = FraudDetectionService.check_fraud(
-            loan_application.user, 
-            loan_application.amount_requested
+        LoanVelocityService.record(loan_application, ip_address=client_ip(self.request))
+
+        if settings.FRAUD_CHECK_ASYNC:
+            loan_id = str(loan_application.id)
+            # Published after commit, or by the outbox relay if the broker is unavailable
+            TaskOutbox.enqueue(run_fraud_checks, loan_id)
+            logger.info(f"Fraud check queued - ID: {loan_id}")
+            return
+
+        # Same entry point as run_fraud_checks, which marks the loan checked once the rules ran
+        FraudDetectionService.process_loan(loan_application)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        if not isinstance(request.data, list) or not request.data:
+            return Response(
+                {'error': 'Expected a non-empty list of loan applications'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > settings.LOAN_BULK_MAX_SIZE:
+            return Response(
+                {'error': f'A batch may contain at most {settings.LOAN_BULK_MAX_SIZE} loan applications'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        loans, batch_reasons = BulkLoanSubmissionService.submit(
+            request.user,
+            serializer.validated_data,
+            ip_address=client_ip(request),
         )
-        
-        if fraud_reasons:
-            FraudDetectionService.flag_loan(loan_application, fraud_reasons)
-            logger.warning(f"Loan flagged for fraud - ID: {loan_application.id}, Reasons: {fraud_reasons}")
+        logger.info(f"Bulk loan applications created - User: {request.user.id}, Count: {len(loans)}")
+
+        results = [
+            {
+                'pkid': loan.pkid,
+                'id': str(loan.id),
+                'amount_requested': str(loan.amount_requested),
+                'status': loan.status,
+                'fraud_flags': [{'reason': reason} for reason in reasons],
+            }
+            for loan, reasons in zip(loans, batch_reasons)
+        ]
+        return Response({
+            'count': len(results),
+            'flagged': sum(1 for reasons in batch_reasons if reasons),
+            'results': results,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def check_status(self, request, pk=None):
+        loan = self.get_object()
+        checked_at = loan.fraud_checked_at.timestamp() if loan.fraud_checked_at else 0
+        etag = make_etag(loan.id, loan.date_updated.timestamp(), checked_at)
+
+        not_modified = not_modified_response(request, etag, loan.date_updated)
+        if not_modified is not None:
+            return not_modified
+        response = Response({
+            'id': str(loan.id),
+            'status': loan.status,
+            'fraud_check': 'completed' if loan.fraud_checked_at else 'pending',
+            'fraud_flags': [{'reason': reason} for reason in loan.flag_reasons],
+            'date_updated': loan.date_updated,
+        })
+        return set_validators(response, etag, loan.date_updated)
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -92,9 +226,6 @@ class LoanApplicationViewSet(ModelViewSet):
         loan.save()
         logger.info(f"Loan approved - ID: {loan.id}, Admin: {request.user.id}")
         
-        # Clear cache safely
-        safe_cache_delete_pattern(f"loans_list_{loan.user.id}_*")
-        
         return Response({'status': 'approved'})
 
     @action(detail=True, methods=['post'])
@@ -104,9 +235,6 @@ class LoanApplicationViewSet(ModelViewSet):
         loan.save()
         logger.info(f"Loan rejected - ID: {loan.id}, Admin: {request.user.id}")
         
-        # Clear cache safely
-        safe_cache_delete_pattern(f"loans_list_{loan.user.id}_*")
-        
         return Response({'status': 'rejected'})
 
     @action(detail=True, methods=['post'])
@@ -116,29 +244,124 @@ class LoanApplicationViewSet(ModelViewSet):
         FraudDetectionService.flag_loan(loan, [reason])
         logger.warning(f"Loan manually flagged - ID: {loan.id}, Admin: {request.user.id}, Reason: {reason}")
         
-        # Clear cache safely
-        safe_cache_delete_pattern(f"loans_list_{loan.user.id}_*")
-        
         return Response({'status': 'flagged'})
 
 
-class FlaggedLoansView(generics.ListAPIView):
+class FlaggedLoansView(LoanPaginationMixin, LoanListFastPathMixin, generics.ListAPIView):
     serializer_class = LoanApplicationSerializer
     permission_classes = [IsAdminUser]
     pagination_class = LoanPagination
 
     def get_queryset(self):
-        return LoanApplication.objects.filter(status=LoanStatus.FLAGGED).prefetch_related('fraud_flags')
+        return LoanApplication.objects.filter(status=LoanStatus.FLAGGED).for_listing()
 
     def list(self, request, *args, **kwargs):
-        cache_key = "flagged_loans_list"
-        cached_response = cache.get(cache_key)
-        
-        if cached_response:
-            logger.info("Cache hit for flagged loans list")
-            return Response(cached_response)
-        
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=300)
-        logger.info("Flagged loans list cached")
-        return response
\ No newline at end of file
+        key = flagged_loans_cache_key(request)
+        etag = versioned_etag(key)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            logger.info("Flagged loans list not modified")
+            return not_modified
+
+        list_page = super().list
+
+        def render():
+            data = list_page(request, *args, **kwargs).data
+            logger.info("Flagged loans list cached")
+            return data
+
+        data = get_or_compute(key, render, timeout=300, name=FLAGGED_LOANS_CACHE)
+        return set_validators(Response(data), etag)
+
+
+class LoanExportView(generics.GenericAPIView):
+    permission_classes = [IsAdminUser]
+
+    def parse_bound(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value) or parse_date(value)
+        except ValueError:
+            # Well formed but impossible, like 2024-02-30
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'Expected an ISO 8601 date or datetime'})
+        return parsed
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in LoanExportService.content_types:
+            raise ValidationError({'export_format': f'Expected one of: {", ".join(LoanExportService.content_types)}'})
+
+        loan_status = request.query_params.get('status')
+        if loan_status and loan_status not in LoanStatus.values:
+            raise ValidationError({'status': f'Expected one of: {", ".join(LoanStatus.values)}'})
+
+        queryset = LoanExportService.filter_queryset(
+            status=loan_status,
+            date_from=self.parse_bound('date_from'),
+            date_to=self.parse_bound('date_to'),
+        )
+        logger.info(f"Loan export started - Admin: {request.user.id}, Format: {export_format}, Status: {loan_status}")
+
+        if isinstance(request._request, ASGIRequest):
+            rows = LoanExportService.astream(queryset, export_format)
+        else:
+            rows = LoanExportService.stream(queryset, export_format)
+        response = StreamingHttpResponse(rows, content_type=LoanExportService.content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="loan-applications.{export_format}"'
+        return response
+
+
+class LoanStatsView(generics.GenericAPIView):
+    permission_classes = [IsAdminUser]
+
+    def parse_day(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            # Well formed but impossible, like 2024-02-30
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'Expected an ISO 8601 date'})
+        return parsed
+
+    def get(self, request, *args, **kwargs):
+        data = get_or_compute(
+            loan_stats_cache_key(request), self.build_stats, timeout=settings.CACHE_TIMEOUT, name=LOAN_STATS_CACHE
+        )
+        return Response(data)
+
+    def build_stats(self):
+        queryset = LoanDailyStats.objects.all()
+        date_from, date_to = self.parse_day('date_from'), self.parse_day('date_to')
+        if date_from:
+            queryset = queryset.filter(day__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(day__lte=date_to)
+
+        days = []
+        totals = {}
+        for row in queryset.values('day', 'status', 'flag_reason', 'loan_count', 'amount_total'):
+            if not row['loan_count']:
+                continue
+            if not row['flag_reason']:
+                total = totals.setdefault(row['status'], {'loan_count': 0, 'amount_total': 0})
+                total['loan_count'] += row['loan_count']
+                total['amount_total'] += row['amount_total']
+            days.append({**row, 'amount_total': str(row['amount_total'])})
+
+        data = {
+            'totals': {
+                loan_status: {'loan_count': total['loan_count'], 'amount_total': str(total['amount_total'])}
+                for loan_status, total in totals.items()
+            },
+            'days': days,
+        }
+        logger.info("Loan stats cached")
+        return data
@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .caching import invalidate_user_caches
 from .forms import CustomUserChangeForm, CustomUserCreationForm
-from .models import User
+from .lockout import LoginThrottleService
+from .models import DomainUsage, User
 
 
 class UserAdmin(BaseUserAdmin):
@@ -39,6 +42,7 @@ class UserAdmin(BaseUserAdmin):
                 "fields": (
                     "email",
                     "password",
+                    "email_domain",
                 )
             },
         ),
@@ -76,13 +80,27 @@ class UserAdmin(BaseUserAdmin):
         ),
     )
     search_fields = ["email", "username", "first_name", "last_name"]
+    readonly_fields = ["email_domain"]
 
     actions = ["unlock_accounts"]
 
     def unlock_accounts(self, request, queryset):
-        queryset.update(is_locked=False, failed_login_attempts=0)
+        users = list(queryset.values_list("id", "email"))
+        queryset.update(is_locked=False, failed_login_attempts=0, updated_at=timezone.now())
+        LoginThrottleService.reset(*[email for _, email in users])
+        # update() sends no post_save signals
+        invalidate_user_caches(*[user_id for user_id, _ in users])
         self.message_user(request, "Selected accounts have been unlocked.")
     unlock_accounts.short_description = "Unlock selected accounts"
 
+
+@admin.register(DomainUsage)
+class DomainUsageAdmin(admin.ModelAdmin):
+    list_display = ["domain", "active_users", "updated_at"]
+    search_fields = ["domain"]
+    ordering = ["-active_users"]
+    readonly_fields = ["domain", "active_users"]
+
+
 # admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
\ No newline at end of file
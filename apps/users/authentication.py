@@ -0,0 +1,104 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+from apps.common.tiered_cache import LocalLRUCache
+from apps.users.caching import auth_user_cache, auth_user_cache_key
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# What request.user needs on most requests; other fields load lazily on first access.
+# email_domain and is_active are kept so a save() through request.user adjusts DomainUsage correctly.
+AUTH_USER_FIELDS = [
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname in {
+        "pkid", "id", "username", "first_name", "last_name", "email", "email_domain",
+        "is_staff", "is_active", "is_superuser", "is_locked",
+    }
+]
+
+# Verified claims never change for a given token, so they only live in process memory
+token_claims_cache = LocalLRUCache(
+    settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that remembers verified token claims and the token's user.
+
+    Claims are cached per token digest until the token expires, and the user is
+    rebuilt from a slim projection in the two-tier cache, so a repeat request
+    costs neither a signature check nor a users query.
+    """
+
+    @staticmethod
+    def token_digest(raw_token):
+        return hashlib.sha256(raw_token).hexdigest()
+
+    def get_validated_token(self, raw_token):
+        digest = self.token_digest(raw_token)
+        claims = token_claims_cache.get(digest, None)
+        if claims is not None:
+            token = self.token_from_claims(raw_token, claims)
+            if token is not None:
+                return token
+
+        token = super().get_validated_token(raw_token)
+        expires_in = (datetime_from_epoch(token["exp"]) - aware_utcnow()).total_seconds()
+        token_claims_cache.set(digest, token.payload, expires_in)
+        return token
+
+    @staticmethod
+    def token_from_claims(raw_token, claims):
+        """Token object for already verified ``claims``, without decoding ``raw_token`` again."""
+        for AuthToken in api_settings.AUTH_TOKEN_CLASSES:
+            if claims.get(api_settings.TOKEN_TYPE_CLAIM) != AuthToken.token_type:
+                continue
+            token = AuthToken.__new__(AuthToken)
+            token.token = raw_token
+            token.current_time = aware_utcnow()
+            token.payload = claims
+            try:
+                token.check_exp()
+            except TokenError:
+                raise InvalidToken(_("Token is expired"))
+            return token
+        return None
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the password hash, which the projection leaves out
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = auth_user_cache_key(user_id)
+        values = auth_user_cache.get(key)
+        if values is None:
+            values = (
+                User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list(*AUTH_USER_FIELDS)
+                .first()
+            )
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            auth_user_cache.set(key, values, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+            logger.debug(f"Authenticated user cached - User: {user_id}")
+
+        user = User.from_db(User.objects.db, AUTH_USER_FIELDS, values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,36 @@
+from apps.common.cache import bump_generation, request_cache_key, track_cache
+from apps.common.tiered_cache import TwoTierCache
+
+USERS_SCOPE = "users:all"
+
+USER_LIST_CACHE = track_cache("user_list")
+USER_DETAIL_CACHE = track_cache("user_detail")
+
+# Serialized user details, read far more often than users change
+user_detail_cache = TwoTierCache("users")
+
+# Slim rows JWT authentication rebuilds request.user from
+auth_user_cache = TwoTierCache("auth_users")
+
+
+def user_detail_cache_key(user_id):
+    return f"user_detail_{user_id}"
+
+
+def auth_user_cache_key(user_id):
+    return f"auth_user_{user_id}"
+
+
+def user_list_cache_key(request):
+    return request_cache_key(USER_LIST_CACHE, request, [USERS_SCOPE])
+
+
+def invalidate_user_detail(*user_ids):
+    user_detail_cache.delete_many([user_detail_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_user_caches(*user_ids):
+    """Drop the cached details and auth rows of ``user_ids`` and every cached users list."""
+    invalidate_user_detail(*user_ids)
+    auth_user_cache.delete_many([auth_user_cache_key(user_id) for user_id in user_ids])
+    bump_generation(USERS_SCOPE)
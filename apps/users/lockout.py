@@ -0,0 +1,61 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class LoginThrottleService:
+    """
+    Failed-login counters kept in the cache (Redis) with a fixed expiry window.
+
+    Failures are counted per email, to lock the account, and per client IP, to
+    rate-limit credential stuffing across many accounts. Nothing is written to
+    the users table except the lock transition itself.
+    """
+
+    @staticmethod
+    def _cache():
+        return caches[settings.LOGIN_THROTTLE_CACHE]
+
+    @staticmethod
+    def _key(dimension, identifier):
+        return f"login_failures:{dimension}:{identifier}"
+
+    @staticmethod
+    def _email_key(email):
+        return LoginThrottleService._key("email", email.strip().lower())
+
+    @staticmethod
+    def _increment(key):
+        cache = LoginThrottleService._cache()
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # add() only succeeds for the first failure of a window, which sets its expiry
+            if cache.add(key, 1, timeout=settings.LOGIN_FAILURE_WINDOW):
+                return 1
+            return cache.incr(key)
+
+    @staticmethod
+    def is_rate_limited(ip_address):
+        if not ip_address:
+            return False
+        failures = LoginThrottleService._cache().get(LoginThrottleService._key("ip", ip_address), 0)
+        return failures >= settings.LOGIN_IP_MAX_FAILURES
+
+    @staticmethod
+    def record_failure(email, ip_address=None):
+        """Count a failed attempt; returns the failures of ``email`` in the current window."""
+        if ip_address:
+            LoginThrottleService._increment(LoginThrottleService._key("ip", ip_address))
+        return LoginThrottleService._increment(LoginThrottleService._email_key(email))
+
+    @staticmethod
+    def failures(email):
+        return LoginThrottleService._cache().get(LoginThrottleService._email_key(email), 0)
+
+    @staticmethod
+    def reset(*emails):
+        LoginThrottleService._cache().delete_many([LoginThrottleService._email_key(email) for email in emails])
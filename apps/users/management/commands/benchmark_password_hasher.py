@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from apps.users.hashers import ConfigurableArgon2PasswordHasher
+
+
+class Command(BaseCommand):
+    help = "Measure password checks per second for the configured (or given) Argon2 cost parameters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Password checks to time")
+        parser.add_argument("--time-cost", type=int, help="Override ARGON2_TIME_COST")
+        parser.add_argument("--memory-cost", type=int, help="Override ARGON2_MEMORY_COST (KiB)")
+        parser.add_argument("--parallelism", type=int, help="Override ARGON2_PARALLELISM")
+
+    def handle(self, *args, **options):
+        overrides = {
+            setting: options[option]
+            for setting, option in (
+                ("ARGON2_TIME_COST", "time_cost"),
+                ("ARGON2_MEMORY_COST", "memory_cost"),
+                ("ARGON2_PARALLELISM", "parallelism"),
+            )
+            if options[option] is not None
+        }
+        with override_settings(**overrides):
+            hasher = ConfigurableArgon2PasswordHasher()
+            encoded = hasher.encode("benchmark-password", hasher.salt())
+
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            for _ in range(options["iterations"]):
+                hasher.verify("benchmark-password", encoded)
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+
+            self.stdout.write(
+                f"Argon2 time_cost={hasher.time_cost}, memory_cost={hasher.memory_cost} KiB, "
+                f"parallelism={hasher.parallelism}"
+            )
+        self.stdout.write(f"{wall / options['iterations'] * 1000:.1f} ms per login (wall clock)")
+        # Argon2 spreads its lanes over threads, so CPU time is what bounds a busy server
+        self.stdout.write(self.style.SUCCESS(f"{options['iterations'] / cpu:.1f} logins/sec per core"))
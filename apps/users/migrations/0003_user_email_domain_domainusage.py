@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:16
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0002_add_user_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DomainUsage",
+            fields=[
+                (
+                    "pkid",
+                    models.BigAutoField(
+                        editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "domain",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Domain"
+                    ),
+                ),
+                (
+                    "active_users",
+                    models.PositiveIntegerField(default=0, verbose_name="Active Users"),
+                ),
+            ],
+            options={
+                "verbose_name": "Domain Usage",
+                "verbose_name_plural": "Domain Usage",
+            },
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="email_domain",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=255,
+                verbose_name="Email Domain",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["email_domain", "is_active"],
+                name="users_user_email_d_841d4b_idx",
+            ),
+        ),
+    ]
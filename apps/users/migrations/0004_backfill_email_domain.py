@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_email_domain(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    DomainUsage = apps.get_model("users", "DomainUsage")
+
+    batch = []
+    for user in User.objects.only("pkid", "email").iterator(chunk_size=2000):
+        user.email_domain = (
+            user.email.rsplit("@", 1)[-1].strip().lower() if "@" in user.email else ""
+        )
+        batch.append(user)
+        if len(batch) >= 2000:
+            User.objects.bulk_update(batch, ["email_domain"])
+            batch = []
+    if batch:
+        User.objects.bulk_update(batch, ["email_domain"])
+
+    counts = (
+        User.objects.filter(is_active=True)
+        .exclude(email_domain="")
+        .values("email_domain")
+        .annotate(active_users=Count("pkid"))
+        .order_by()
+    )
+    DomainUsage.objects.all().delete()
+    DomainUsage.objects.bulk_create(
+        [
+            DomainUsage(domain=row["email_domain"], active_users=row["active_users"])
+            for row in counts
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_email_domain_domainusage"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_email_domain, migrations.RunPython.noop),
+    ]
@@ -2,14 +2,25 @@ import uuid
 
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 from phonenumber_field.modelfields import PhoneNumber, PhoneNumberField
 
+from apps.common.models import TimeStampedModel
+
 from .managers import CustomUserManager
 
 
+def domain_from_email(email):
+    """Normalized domain part of an email address ("" when there is none)."""
+    if not email or "@" not in email:
+        return ""
+    return email.rsplit("@", 1)[1].strip().lower()
+
+
 class Gender(models.TextChoices):
     MALE = 'Male', _("Male")
     FEMALE = 'Female', _("Female")
@@ -22,6 +33,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(verbose_name=_("First Name"), max_length=50, db_index=True)
     last_name = models.CharField(verbose_name=_("Last Name"), max_length=50, db_index=True)
     email = models.EmailField(verbose_name=_("Email Address"), unique=True, db_index=True)
+    email_domain = models.CharField(
+        verbose_name=_("Email Domain"), max_length=255, editable=False, blank=True, db_index=True
+    )
     gender = models.CharField(verbose_name=_("Gender"), choices=Gender.choices, default=Gender.OTHER, max_length=20)
     phone_number = PhoneNumberField(verbose_name=_("Phone Number"), max_length=30, default="+234123456789")
     profile_photo = models.ImageField(verbose_name=_("Profile photo"), default='/profile_default.png')
@@ -30,6 +44,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False, db_index=True)
     is_active = models.BooleanField(default=True, db_index=True)
     date_joined = models.DateTimeField(default=timezone.now, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     failed_login_attempts = models.IntegerField(default=0)
     is_locked = models.BooleanField(default=False, db_index=True)
 
@@ -48,14 +63,69 @@ class User(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=['date_joined', 'is_active']),
             models.Index(fields=['is_locked', 'failed_login_attempts']),
             models.Index(fields=['first_name', 'last_name']),
+            models.Index(fields=['email_domain', 'is_active']),
         ]
 
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so DomainUsage can be adjusted by the delta on save
+        instance._loaded_domain_state = (instance.__dict__.get("email_domain"), instance.__dict__.get("is_active"))
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.email_domain = domain_from_email(self.email)
+        update_fields = kwargs.get("update_fields")
+        deferred = self.get_deferred_fields()
+        if update_fields is None and deferred and not self._state.adding:
+            # Django narrows saves of partly loaded users (the slim request.user) to the loaded fields
+            update_fields = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        if update_fields is not None:
+            # updated_at drives the ETag/Last-Modified of the user endpoints
+            extra_fields = {"updated_at", "email_domain"} if "email" in update_fields else {"updated_at"}
+            kwargs["update_fields"] = {*update_fields, *extra_fields}
+        super().save(*args, **kwargs)
+
     @property
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
 
     def get_short_name(self):
         return self.username
+
+
+class DomainUsageManager(models.Manager):
+    def adjust(self, domain, delta):
+        """Atomically add ``delta`` to the active user count of ``domain``."""
+        if not domain or not delta:
+            return
+        updated = self.filter(domain=domain).update(
+            active_users=Greatest(F("active_users") + delta, 0)
+        )
+        if not updated and delta > 0:
+            usage, created = self.get_or_create(domain=domain, defaults={"active_users": delta})
+            if not created:
+                self.filter(pk=usage.pk).update(active_users=F("active_users") + delta)
+
+
+class DomainUsage(TimeStampedModel):
+    """Number of active users per email domain, maintained by the user signals."""
+
+    domain = models.CharField(verbose_name=_("Domain"), max_length=255, unique=True)
+    active_users = models.PositiveIntegerField(verbose_name=_("Active Users"), default=0)
+
+    objects = DomainUsageManager()
+
+    class Meta:
+        verbose_name = _("Domain Usage")
+        verbose_name_plural = _("Domain Usage")
+
+    def __str__(self):
+        return f"{self.domain}: {self.active_users}"
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_user_caches
+from .models import DomainUsage, User
+
+
+def _active_domain(domain, is_active):
+    return domain if is_active else None
+
+
+@receiver(post_save, sender=User)
+def update_domain_usage_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_domain, old_active = getattr(instance, "_loaded_domain_state", (None, False))
+    if created:
+        old_domain, old_active = None, False
+
+    before = _active_domain(old_domain, old_active)
+    after = _active_domain(instance.email_domain, instance.is_active)
+    if before != after:
+        DomainUsage.objects.adjust(before, -1)
+        DomainUsage.objects.adjust(after, 1)
+    instance._loaded_domain_state = (instance.email_domain, instance.is_active)
+
+
+@receiver(post_delete, sender=User)
+def update_domain_usage_on_delete(sender, instance, **kwargs):
+    domain, is_active = getattr(
+        instance, "_loaded_domain_state", (instance.email_domain, instance.is_active)
+    )
+    DomainUsage.objects.adjust(_active_domain(domain, is_active), -1)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_user_caches(instance.id)
@@ -1,10 +1,13 @@
 import logging
+import uuid
+from types import SimpleNamespace
+
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import (
@@ -13,6 +16,17 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
+from apps.common.cache import get_or_compute, record_cache_access
+from apps.common.conditional import make_etag, not_modified_response, set_validators, versioned_etag
+from apps.common.throttling import client_ip
+from apps.users.caching import (
+    USER_DETAIL_CACHE,
+    USER_LIST_CACHE,
+    user_detail_cache,
+    user_detail_cache_key,
+    user_list_cache_key,
+)
+from apps.users.lockout import LoginThrottleService
 from apps.users.paginations import UserPagination
 
 User = get_user_model()
@@ -28,31 +42,62 @@ class CustomTokenObtainPairView(TokenObtainPairView):
             if not email:
                 return Response({"error": "Email is required"}, status=status.HTTP_400_BAD_REQUEST)
             
+            ip_address = client_ip(request)
+            if LoginThrottleService.is_rate_limited(ip_address):
+                logger.warning(f"Login rate limited - IP: {ip_address}")
+                response = Response(
+                    {"error": "Too many failed login attempts. Try again later."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+                response["Retry-After"] = str(settings.LOGIN_FAILURE_WINDOW)
+                return response
+
             try:
                 user = User.objects.get(email=email)
             except User.DoesNotExist:
+                LoginThrottleService.record_failure(email, ip_address)
                 logger.warning(f"Login attempt with non-existent email: {email}")
                 return Response({"error": "No active account found with the given credentials"}, status=status.HTTP_401_UNAUTHORIZED)
             
-            if serializer.is_valid():
-                if user.is_locked:
-                    logger.warning(f"Login attempt on locked account - User: {user.id}")
-                    return Response(
-                        {"error": "Account is locked due to too many failed login attempts."},
-                        status=status.HTTP_403_FORBIDDEN,
-                    )
-                
-                user.failed_login_attempts = 0
-                user.save()
+            # Rejected before the serializer so these never pay for a password hash
+            if user.is_locked:
+                logger.warning(f"Login attempt on locked account - User: {user.id}")
+                return Response(
+                    {"error": "Account is locked due to too many failed login attempts."},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+            if not user.is_active:
+                logger.warning(f"Login attempt on inactive account - User: {user.id}")
+                return Response(
+                    {"error": "No active account found with the given credentials"},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+
+            try:
+                # Also rehashes the password when the ARGON2_* cost settings changed
+                authenticated = serializer.is_valid()
+            except AuthenticationFailed:
+                # simplejwt raises rather than reporting bad credentials as errors
+                authenticated = False
+
+            if authenticated:
+                if LoginThrottleService.failures(email):
+                    LoginThrottleService.reset(email)
+                if user.failed_login_attempts:
+                    # Left over from before the counters moved to the cache
+                    user.failed_login_attempts = 0
+                    user.save(update_fields=["failed_login_attempts"])
                 logger.info(f"Successful login - User: {user.id}")
                 return Response(serializer.validated_data, status=status.HTTP_200_OK)
             else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= 3:
+                failures = LoginThrottleService.record_failure(email, ip_address)
+                if failures >= settings.LOGIN_MAX_FAILED_ATTEMPTS:
+                    # The lock transition is the only failed-login state stored on the user
                     user.is_locked = True
+                    user.failed_login_attempts = failures
+                    user.save(update_fields=["is_locked", "failed_login_attempts"])
                     logger.warning(f"Account locked due to failed attempts - User: {user.id}")
-                user.save()
-                logger.warning(f"Failed login attempt - User: {user.id}, Attempts: {user.failed_login_attempts}")
+                logger.warning(f"Failed login attempt - User: {user.id}, Attempts: {failures}")
                 return Response({"error": "No active account found with the given credentials"}, status=status.HTTP_401_UNAUTHORIZED)
         except Exception as e:
             logger.error(f"Login error: {str(e)}")
@@ -79,31 +124,58 @@ class CustomUsersViewSet(UserViewSet):
     lookup_url_kwarg = "id"
 
     def list(self, request, *args, **kwargs):
-        cache_key = f"user_list_{hash(str(request.query_params))}"
-        cached_response = cache.get(cache_key)
-        
-        if cached_response:
-            logger.info("Cache hit for users list")
-            return Response(cached_response, status=status.HTTP_200_OK)
-
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=settings.CACHE_TIMEOUT)
-        logger.info("Users list cached")
-        return Response(response.data, status=status.HTTP_200_OK)
-    
+        key = user_list_cache_key(request)
+        etag = versioned_etag(key)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            logger.info("Users list not modified")
+            return not_modified
+
+        list_page = super().list
+
+        def render():
+            data = list_page(request, *args, **kwargs).data
+            logger.info("Users list cached")
+            return data
+
+        data = get_or_compute(key, render, timeout=settings.CACHE_TIMEOUT, name=USER_LIST_CACHE)
+        return set_validators(Response(data, status=status.HTTP_200_OK), etag)
+
+    def get_instance(self):
+        # request.user is the slim projection from CachedJWTAuthentication; /me serializes and saves the full row
+        return User.objects.get(pk=self.request.user.pk)
+
+    def get_detail_user_id(self):
+        """UUID of the requested user from the URL (or the requester for /me), without a query."""
+        if self.action == "me":
+            return self.request.user.id
+        try:
+            return uuid.UUID(str(self.kwargs[self.lookup_url_kwarg]))
+        except (KeyError, ValueError):
+            return None
+
     def retrieve(self, request, *args, **kwargs):
-        user = self.get_object()
-        serializer = self.get_serializer(user)
-        
-        cache_key = f"user_detail_{user.id}"
-        cached_response = cache.get(cache_key)
-        
-        if cached_response:
-            logger.info(f"Cache hit for user detail - User: {user.id}")
-            return Response(cached_response, status=status.HTTP_200_OK)
+        user_id = self.get_detail_user_id()
+        entry = user_detail_cache.get(user_detail_cache_key(user_id)) if user_id else None
 
-        response_data = serializer.data
-        cache.set(cache_key, response_data, timeout=settings.CACHE_TIMEOUT)
-        logger.info(f"User detail cached - User: {user.id}")
-        
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        record_cache_access(USER_DETAIL_CACHE, hit=entry is not None)
+        if entry is not None:
+            # The cached entry carries what the object permissions look at
+            self.check_object_permissions(request, SimpleNamespace(pk=entry["pk"], id=user_id))
+            logger.info(f"Cache hit for user detail - User: {user_id}")
+        else:
+            user = self.get_object()
+            entry = {
+                "pk": user.pk,
+                "updated_at": user.updated_at,
+                "data": self.get_serializer(user).data,
+            }
+            user_detail_cache.set(user_detail_cache_key(user.id), entry, timeout=settings.CACHE_TIMEOUT)
+            logger.info(f"User detail cached - User: {user.id}")
+
+        etag = make_etag(user_id, entry["updated_at"].timestamp())
+        not_modified = not_modified_response(request, etag, entry["updated_at"])
+        if not_modified is not None:
+            logger.info(f"User detail not modified - User: {user_id}")
+            return not_modified
+        return set_validators(Response(entry["data"], status=status.HTTP_200_OK), etag, entry["updated_at"])
@@ -1,4 +1,5 @@
 import os
+from fnmatch import fnmatch
 
 from celery import Celery
 from django.conf import settings
@@ -10,4 +11,18 @@ app = Celery("loan_be")
 
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
-app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
\ No newline at end of file
+
+class QueueProfileAnnotation:
+    """Give each task the acks_late/rate_limit of the queue it is routed to (CELERY_QUEUE_PROFILES)."""
+
+    def annotate(self, task):
+        for pattern, route in settings.CELERY_TASK_ROUTES.items():
+            if fnmatch(task.name, pattern):
+                profile = settings.CELERY_QUEUE_PROFILES[route["queue"]]
+                return {"acks_late": profile["acks_late"], "rate_limit": profile["rate_limit"]}
+        return None
+
+
+app.conf.task_annotations = [QueueProfileAnnotation()]
+
+app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
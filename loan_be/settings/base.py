@@ -58,6 +58,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "apps.common.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -103,13 +104,19 @@ DATABASES = {"default": env.db("DATABASE_URL")}
 
 
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "apps.users.hashers.ConfigurableArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
     "django.contrib.auth.hashers.ScryptPasswordHasher",
 ]
 
+# Argon2 cost per password check; login throughput is bounded by it, see
+# `manage.py benchmark_password_hasher`. Changes apply to each user on next login.
+ARGON2_TIME_COST = env.int("ARGON2_TIME_COST", 2)
+ARGON2_MEMORY_COST = env.int("ARGON2_MEMORY_COST", 102400)
+ARGON2_PARALLELISM = env.int("ARGON2_PARALLELISM", 8)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -173,13 +180,97 @@ CELERY_TASK_SEND_SENT_EVENT = True
 if USE_TZ:
     CELERY_TIMEZONE = TIME_ZONE
 
+# Tasks are routed to named queues so slow email work can't starve fraud
+# checks. Each queue has a profile: prefetch for the workers that consume
+# it (picked with CELERY_WORKER_PROFILE), and acks_late/rate_limit applied to
+# the tasks routed to it by loan_be.celery.QueueProfileAnnotation.
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "apps.loans.tasks.run_fraud_checks": {"queue": "fraud"},
+    "apps.loans.tasks.send_fraud_notification_*": {"queue": "notifications"},
+    "apps.common.tasks.relay_task_outbox": {"queue": "maintenance"},
+}
+CELERY_QUEUE_PROFILES = {
+    "default": {"prefetch_multiplier": 4, "acks_late": False, "rate_limit": None},
+    "fraud": {"prefetch_multiplier": 1, "acks_late": True, "rate_limit": None},
+    "notifications": {
+        "prefetch_multiplier": 4,
+        "acks_late": True,
+        "rate_limit": env("CELERY_NOTIFICATIONS_RATE_LIMIT", default="120/m"),
+    },
+    "maintenance": {"prefetch_multiplier": 1, "acks_late": False, "rate_limit": None},
+}
+CELERY_WORKER_PROFILE = env("CELERY_WORKER_PROFILE", default="default")
+CELERY_WORKER_PREFETCH_MULTIPLIER = CELERY_QUEUE_PROFILES[CELERY_WORKER_PROFILE]["prefetch_multiplier"]
+# acks_late tasks are redelivered, not lost, when their worker dies mid-task
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+
+# Retries of send_fraud_notification_email: exponential backoff from this many
+# seconds, capped at FRAUD_NOTIFICATION_RETRY_BACKOFF_MAX
+FRAUD_NOTIFICATION_MAX_RETRIES = env.int("FRAUD_NOTIFICATION_MAX_RETRIES", 5)
+FRAUD_NOTIFICATION_RETRY_BACKOFF = env.int("FRAUD_NOTIFICATION_RETRY_BACKOFF", 30)
+FRAUD_NOTIFICATION_RETRY_BACKOFF_MAX = env.int("FRAUD_NOTIFICATION_RETRY_BACKOFF_MAX", 600)
+
+# Fraud notifications (apps.loans.notifications): each flagged loan is mailed on
+# its own while at most FRAUD_NOTIFICATION_IMMEDIATE_LIMIT are pending, otherwise
+# it waits for the digest sent every FRAUD_NOTIFICATION_DIGEST_INTERVAL seconds.
+# Staff users receive them; the fallback list is used when there are none.
+FRAUD_NOTIFICATION_IMMEDIATE_LIMIT = env.int("FRAUD_NOTIFICATION_IMMEDIATE_LIMIT", 5)
+FRAUD_NOTIFICATION_DIGEST_INTERVAL = env.int("FRAUD_NOTIFICATION_DIGEST_INTERVAL", 300)
+FRAUD_NOTIFICATION_BATCH_SIZE = env.int("FRAUD_NOTIFICATION_BATCH_SIZE", 500)
+# Seconds a sender may hold notifications before another one sends them again
+FRAUD_NOTIFICATION_CLAIM_TIMEOUT = env.int("FRAUD_NOTIFICATION_CLAIM_TIMEOUT", 600)
+FRAUD_NOTIFICATION_FALLBACK_RECIPIENTS = env.list(
+    "FRAUD_NOTIFICATION_FALLBACK_RECIPIENTS", default=["admin@example.com"]
+)
+
+# Transactional task outbox (apps.common.outbox): relayed every
+# TASK_OUTBOX_RELAY_INTERVAL seconds in batches, published rows kept
+# TASK_OUTBOX_RETENTION seconds; after a broker failure the on_commit fast path
+# is skipped for TASK_OUTBOX_FAST_PATH_COOLDOWN seconds
+TASK_OUTBOX_RELAY_INTERVAL = env.int("TASK_OUTBOX_RELAY_INTERVAL", 10)
+TASK_OUTBOX_BATCH_SIZE = env.int("TASK_OUTBOX_BATCH_SIZE", 500)
+TASK_OUTBOX_MAX_ATTEMPTS = env.int("TASK_OUTBOX_MAX_ATTEMPTS", 20)
+TASK_OUTBOX_RETENTION = env.int("TASK_OUTBOX_RETENTION", 24 * 60 * 60)
+TASK_OUTBOX_FAST_PATH_COOLDOWN = env.int("TASK_OUTBOX_FAST_PATH_COOLDOWN", 30)
+
+CELERY_BEAT_SCHEDULE = {
+    "relay-task-outbox": {
+        "task": "apps.common.tasks.relay_task_outbox",
+        "schedule": TASK_OUTBOX_RELAY_INTERVAL,
+    },
+    "send-fraud-notification-digest": {
+        "task": "apps.loans.tasks.send_fraud_notification_digest",
+        "schedule": FRAUD_NOTIFICATION_DIGEST_INTERVAL,
+    },
+}
+
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        "apps.users.authentication.CachedJWTAuthentication",
+    ),
+    # orjson-backed when installed, identical output to the stdlib classes otherwise
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.common.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "apps.common.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # Reverse proxies in front of the app (docker/local/nginx), so client IPs
+    # are read from X-Forwarded-For instead of REMOTE_ADDR
+    "NUM_PROXIES": env.int("NUM_PROXIES", 1),
 }
 
+# Responses smaller than this many bytes are not gzip/brotli compressed
+RESPONSE_COMPRESSION_MIN_SIZE = env.int("RESPONSE_COMPRESSION_MIN_SIZE", 1024)
+
+# Brotli quality (0-11) used when the optional brotli package is installed
+RESPONSE_BROTLI_QUALITY = env.int("RESPONSE_BROTLI_QUALITY", 5)
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
@@ -190,6 +281,64 @@ CACHES = {
 
 CACHE_TIMEOUT = 300
 
+# Part of every cached response key, so a new API version never reads old entries
+API_VERSION = "v1"
+
+# Count cache hits/misses per cached view (python manage.py cache_stats)
+CACHE_STATS_ENABLED = env.bool("CACHE_STATS_ENABLED", True)
+
+# Failed logins are counted in this cache alias for LOGIN_FAILURE_WINDOW seconds;
+# an account is locked after LOGIN_MAX_FAILED_ATTEMPTS and a client IP gets 429s
+# after LOGIN_IP_MAX_FAILURES failures on any accounts
+LOGIN_THROTTLE_CACHE = "default"
+LOGIN_FAILURE_WINDOW = env.int("LOGIN_FAILURE_WINDOW", 15 * 60)
+LOGIN_MAX_FAILED_ATTEMPTS = env.int("LOGIN_MAX_FAILED_ATTEMPTS", 3)
+LOGIN_IP_MAX_FAILURES = env.int("LOGIN_IP_MAX_FAILURES", 20)
+
+# Verified access token claims kept per process (until the token expires), and
+# seconds the slim user rows behind request.user stay in the two-tier cache
+AUTH_TOKEN_CACHE_MAX_ENTRIES = env.int("AUTH_TOKEN_CACHE_MAX_ENTRIES", 10000)
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", 300)
+
+# Stampede protection (apps.common.cache.get_or_compute): seconds a stale value
+# may still be served while one process refreshes it, lifetime of that
+# process's refresh lock, how long cold misses wait for it, and the early
+# refresh aggressiveness (XFetch beta, 0 disables early refresh)
+CACHE_STALE_TIMEOUT = env.int("CACHE_STALE_TIMEOUT", 300)
+CACHE_LOCK_TIMEOUT = env.int("CACHE_LOCK_TIMEOUT", 10)
+CACHE_LOCK_WAIT = env.float("CACHE_LOCK_WAIT", 2.0)
+CACHE_LOCK_POLL_INTERVAL = 0.05
+CACHE_EARLY_REFRESH_BETA = env.float("CACHE_EARLY_REFRESH_BETA", 1.0)
+
+# In-process LRU tier of apps.common.tiered_cache.TwoTierCache: entries per
+# process and seconds an entry may be served without asking Redis; writes are
+# fanned out to other processes over the pub/sub channel
+LOCAL_CACHE_MAX_ENTRIES = env.int("LOCAL_CACHE_MAX_ENTRIES", 1024)
+LOCAL_CACHE_TIMEOUT = env.int("LOCAL_CACHE_TIMEOUT", 30)
+CACHE_INVALIDATION_CHANNEL = "loan_be:cache-invalidation"
+
+# Run fraud checks in a Celery task instead of inside the create request
+FRAUD_CHECK_ASYNC = env.bool("FRAUD_CHECK_ASYNC", False)
+
+# Largest number of loan applications accepted by the bulk submission endpoint
+LOAN_BULK_MAX_SIZE = env.int("LOAN_BULK_MAX_SIZE", 500)
+
+# Default pagination of loan listings: "page" (page numbers) or "cursor" (keyset)
+LOAN_PAGINATION_MODE = env("LOAN_PAGINATION_MODE", default="page")
+
+# Build loan list responses from values() rows instead of model instances
+LOAN_FAST_LIST_SERIALIZER = env.bool("LOAN_FAST_LIST_SERIALIZER", True)
+
+# Rows fetched per server-side cursor round-trip by the streaming loan export
+LOAN_EXPORT_CHUNK_SIZE = env.int("LOAN_EXPORT_CHUNK_SIZE", 2000)
+
+# Sliding windows (in seconds) kept by the Redis velocity counters
+VELOCITY_WINDOWS = {
+    "1h": 60 * 60,
+    "24h": 24 * 60 * 60,
+    "7d": 7 * 24 * 60 * 60,
+}
+
 
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": (
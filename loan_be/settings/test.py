@@ -41,6 +41,11 @@ DATABASES = {
     }
 }
 
+# Cheap password hashing for tests
+ARGON2_TIME_COST = 1
+ARGON2_MEMORY_COST = 1024
+ARGON2_PARALLELISM = 1
+
 # Disable celery for tests
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
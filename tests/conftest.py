@@ -49,3 +49,26 @@ def regular_user():
         last_name='User',
         password='regularpass123'
     )
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tests',
+        }
+    }
+    from django.core.cache import cache
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_local_caches():
+    from apps.common.tiered_cache import invalidation_bus
+    from apps.users.authentication import token_claims_cache
+    for local_cache in invalidation_bus.caches.values():
+        local_cache.clear()
+    token_claims_cache.clear()
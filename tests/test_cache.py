@@ -0,0 +1,245 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.common.cache import (
+    acquire_refresh_lock,
+    aget_or_compute,
+    bump_generation,
+    cache_stats,
+    get_generations,
+    get_or_compute,
+    request_cache_key,
+    set_many_protected,
+    versioned_cache_key,
+)
+from apps.common.tiered_cache import InvalidationBus, TwoTierCache
+from apps.loans.fraud_rules import FraudRuleEngine, FraudSubject, SharedEmailDomainRule
+from apps.loans.models import LoanStatus
+from tests.factories import LoanApplicationFactory, UserFactory
+
+
+class TestCacheGenerations:
+    def test_bump_changes_versioned_key(self, locmem_cache):
+        key = versioned_cache_key("things", ["scope"], "page=1")
+        assert versioned_cache_key("things", ["scope"], "page=1") == key
+
+        bump_generation("scope")
+        assert versioned_cache_key("things", ["scope"], "page=1") != key
+
+    def test_generations_survive_eviction(self, locmem_cache):
+        before, = get_generations("scope")
+        locmem_cache.clear()
+        after, = get_generations("scope")
+        assert after != before
+
+
+class TestRequestCacheKeys:
+    def make_request(self, user, query):
+        request = Request(APIRequestFactory().get(f"/api/v1/loans/applications/?{query}"))
+        request.user = user
+        return request
+
+    def test_equivalent_queries_share_a_key(self, locmem_cache):
+        staff = UserFactory.build(is_staff=True)
+        first = request_cache_key("things", self.make_request(staff, "page=2&status=PENDING&x=b&x=a"))
+        second = request_cache_key("things", self.make_request(staff, "x=a&status=PENDING&x=b&page=2"))
+        assert first == second
+        assert "PENDING" not in first
+
+    def test_staff_share_keys_and_users_do_not(self, locmem_cache):
+        staff, other_staff = UserFactory.build(is_staff=True), UserFactory.build(is_staff=True)
+        user, other_user = UserFactory.build(pk=1), UserFactory.build(pk=2)
+
+        def key(requester):
+            return request_cache_key("things", self.make_request(requester, "page=1"))
+
+        assert key(staff) == key(other_staff)
+        assert key(user) != key(other_user)
+        assert key(user) != key(staff)
+
+    @pytest.mark.django_db
+    def test_list_hits_and_misses_are_counted(self, api_client, admin_user, locmem_cache, capsys):
+        LoanApplicationFactory(status=LoanStatus.FLAGGED)
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('loans:flagged-loans')
+        api_client.get(url, {'page': 1, 'page_size': 10})
+        api_client.get(url, {'page_size': 10, 'page': 1})
+
+        assert cache_stats("flagged_loans_list") == {"flagged_loans_list": {"hits": 1, "misses": 1}}
+        call_command("cache_stats", "flagged_loans_list", "--reset")
+        assert "1 hit(s), 1 miss(es), 50.0% hit rate" in capsys.readouterr().out
+        assert cache_stats("flagged_loans_list") == {"flagged_loans_list": {"hits": 0, "misses": 0}}
+
+
+class TestStampedeProtection:
+    def test_value_is_computed_once(self, locmem_cache):
+        calls = []
+        for _ in range(3):
+            assert get_or_compute("hot", lambda: calls.append(1) or "value", timeout=60) == "value"
+        assert len(calls) == 1
+
+    def test_expired_value_is_served_while_another_process_refreshes(self, locmem_cache):
+        set_many_protected({"hot": "stale"}, timeout=-1)
+        assert acquire_refresh_lock("hot")
+
+        assert get_or_compute("hot", lambda: pytest.fail("recomputed"), timeout=60) == "stale"
+
+    def test_expired_value_is_recomputed_by_lock_holder(self, locmem_cache):
+        set_many_protected({"hot": "stale"}, timeout=-1)
+        assert get_or_compute("hot", lambda: "fresh", timeout=60) == "fresh"
+        assert get_or_compute("hot", lambda: pytest.fail("recomputed"), timeout=60) == "fresh"
+
+    def test_expensive_value_is_refreshed_early(self, locmem_cache):
+        set_many_protected({"hot": "old"}, timeout=1, delta=3600)
+        assert get_or_compute("hot", lambda: "new", timeout=60) == "new"
+
+    def test_cold_miss_waits_for_concurrent_computation(self, locmem_cache):
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        worker = threading.Thread(target=get_or_compute, args=("cold", slow, 60))
+        worker.start()
+        time.sleep(0.05)
+        assert get_or_compute("cold", slow, timeout=60) == "value"
+        worker.join()
+        assert len(calls) == 1
+
+    def test_cold_miss_computes_after_lock_wait(self, locmem_cache, settings):
+        settings.CACHE_LOCK_WAIT = 0.1
+        assert acquire_refresh_lock("cold")
+        assert get_or_compute("cold", lambda: "value", timeout=60) == "value"
+        # The lock belongs to whoever is still refreshing, not to the caller that gave up waiting
+        assert not acquire_refresh_lock("cold")
+
+    def test_async_concurrent_misses_compute_once(self, locmem_cache):
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "value"
+
+        async def race():
+            return await asyncio.gather(*(aget_or_compute("cold", slow, timeout=60) for _ in range(3)))
+
+        assert asyncio.run(race()) == ["value"] * 3
+        assert len(calls) == 1
+        assert get_or_compute("cold", lambda: pytest.fail("recomputed"), timeout=60) == "value"
+
+    def test_async_stale_value_is_served_while_another_process_refreshes(self, locmem_cache):
+        set_many_protected({"hot": "stale"}, timeout=-1)
+        assert acquire_refresh_lock("hot")
+
+        async def recompute():
+            pytest.fail("recomputed")
+
+        assert asyncio.run(aget_or_compute("hot", recompute, timeout=60)) == "stale"
+
+    @pytest.mark.django_db
+    def test_fraud_engine_serves_stale_domain_count_while_refreshing(self, locmem_cache):
+        user = UserFactory(email="someone@busy.example")
+        set_many_protected({"domain_users_busy.example": 50}, timeout=-1)
+        assert acquire_refresh_lock("domain_users_busy.example")
+
+        reasons = FraudRuleEngine(rules=[SharedEmailDomainRule]).evaluate(FraudSubject(user, 1000))
+        assert reasons == [SharedEmailDomainRule.reason]
+
+
+class TestTwoTierCache:
+    def make_cache(self, **kwargs):
+        return TwoTierCache("tests", bus=InvalidationBus("tests"), **kwargs)
+
+    def test_local_tier_answers_without_shared_cache(self, locmem_cache):
+        tiered = self.make_cache()
+        tiered.set("key", {"value": 1}, timeout=60)
+        locmem_cache.clear()
+        assert tiered.get("key") == {"value": 1}
+
+    def test_local_entries_expire_back_to_shared_cache(self, locmem_cache):
+        tiered = self.make_cache(timeout=0.05)
+        tiered.set("key", "old", timeout=60)
+        locmem_cache.set("key", "new")
+        time.sleep(0.06)
+        assert tiered.get("key") == "new"
+
+    def test_local_tier_is_bounded(self, locmem_cache):
+        tiered = self.make_cache(max_entries=2)
+        tiered.set_many({"a": 1, "b": 2, "c": 3}, timeout=60)
+        assert len(tiered.local) == 2
+        assert tiered.get_many(["a", "b", "c"]) == {"a": 1, "b": 2, "c": 3}
+
+    def test_published_invalidation_drops_local_copy(self, locmem_cache):
+        tiered = self.make_cache()
+        tiered.set("key", "old", timeout=60)
+        locmem_cache.set("key", "new")
+
+        tiered.bus.handle(json.dumps({"namespace": "tests", "origin": "another-process", "keys": ["key"]}))
+        assert tiered.get("key") == "new"
+
+    def test_invalidation_origin_is_a_per_process_token(self, locmem_cache):
+        tiered = self.make_cache()
+        tiered.set("key", "old", timeout=60)
+        origin = tiered.bus.origin
+
+        # A process in another container can have the same PID
+        tiered.bus.handle(json.dumps({"namespace": "tests", "origin": os.getpid(), "keys": ["key"]}))
+        assert tiered.local.get("key", None) is None
+
+        tiered.set("key", "old", timeout=60)
+        tiered.bus.handle(json.dumps({"namespace": "tests", "origin": origin, "keys": ["key"]}))
+        assert tiered.local.get("key") == "old"
+
+        # After a fork the child picks a token of its own
+        tiered.bus._pid = None
+        tiered.bus.ensure_listening()
+        assert tiered.bus.origin != origin
+
+    @pytest.mark.django_db
+    def test_user_update_invalidates_user_detail(self, api_client, regular_user, locmem_cache):
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('usersapi:users-me')
+        assert api_client.get(url).data['city'] == 'Abuja'
+
+        regular_user.city = 'Lagos'
+        regular_user.save()
+        assert api_client.get(url).data['city'] == 'Lagos'
+
+
+@pytest.mark.django_db
+class TestLoanListInvalidation:
+    def test_new_loan_invalidates_cached_list(self, api_client, locmem_cache):
+        user = UserFactory()
+        LoanApplicationFactory(user=user)
+        api_client.force_authenticate(user=user)
+        url = reverse('loans:loan-applications-list')
+
+        assert api_client.get(url).data['count'] == 1
+        api_client.post(url, {'amount_requested': 1000, 'purpose': 'Second'})
+        assert api_client.get(url).data['count'] == 2
+
+    def test_approval_invalidates_user_and_flagged_lists(self, api_client, admin_user, locmem_cache):
+        user = UserFactory()
+        loan = LoanApplicationFactory(user=user, status=LoanStatus.FLAGGED)
+        api_client.force_authenticate(user=admin_user)
+        flagged_url = reverse('loans:flagged-loans')
+        assert api_client.get(flagged_url).data['count'] == 1
+
+        api_client.post(reverse('loans:loan-applications-approve', kwargs={'pk': loan.pk}))
+
+        assert api_client.get(flagged_url).data['count'] == 0
+        api_client.force_authenticate(user=user)
+        response = api_client.get(reverse('loans:loan-applications-list'))
+        assert response.data['results'][0]['status'] == LoanStatus.APPROVED
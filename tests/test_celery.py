@@ -0,0 +1,51 @@
+from smtplib import SMTPException
+from unittest import mock
+
+import pytest
+from django.core import mail
+
+from apps.common.tasks import relay_task_outbox
+from apps.loans.models import FraudNotification
+from apps.loans.notifications import FraudNotificationService
+from apps.loans.tasks import run_fraud_checks, send_fraud_notification_email
+from loan_be.celery import app
+from tests.factories import LoanApplicationFactory
+
+
+class TestQueueRouting:
+    @pytest.mark.parametrize("task, queue", [
+        (run_fraud_checks, "fraud"),
+        (send_fraud_notification_email, "notifications"),
+        (relay_task_outbox, "maintenance"),
+    ])
+    def test_tasks_are_routed_with_their_queue_profile(self, task, queue, settings):
+        assert app.amqp.router.route({}, task.name)["queue"].name == queue
+        assert task.acks_late == settings.CELERY_QUEUE_PROFILES[queue]["acks_late"]
+        assert task.rate_limit == settings.CELERY_QUEUE_PROFILES[queue]["rate_limit"]
+
+    def test_unrouted_tasks_use_the_default_queue(self):
+        assert app.amqp.router.route({}, "apps.loans.tasks.unknown")["queue"].name == "default"
+
+
+@pytest.mark.django_db
+class TestNotificationRetry:
+    def test_failed_email_is_retried(self):
+        notification = FraudNotification.objects.create(loan_application=LoanApplicationFactory(), reasons=["Test"])
+        send = FraudNotificationService.send
+        attempts = iter([SMTPException("unavailable")])
+
+        def flaky_send(*args):
+            error = next(attempts, None)
+            if error is not None:
+                raise error
+            return send(*args)
+
+        with mock.patch.object(FraudNotificationService, "send", side_effect=flaky_send) as patched:
+            # Without propagation apply() runs the retry inline instead of raising Retry
+            result = send_fraud_notification_email.apply((str(notification.id),), throw=False)
+
+        assert result.successful()
+        assert patched.call_count == 2
+        assert len(mail.outbox) == 1
+        notification.refresh_from_db()
+        assert notification.sent_at is not None
@@ -0,0 +1,60 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.loans.models import FraudFlag, LoanApplication
+from apps.loans.services import FraudDetectionService
+from tests.factories import FraudFlagFactory, LoanApplicationFactory
+
+
+@pytest.mark.django_db
+class TestFlagSummary:
+    def test_flag_loan_appends_to_summary(self):
+        loan = LoanApplicationFactory()
+        FraudDetectionService.flag_loan(loan, ["First"])
+        FraudDetectionService.flag_loan(loan, ["Second", "Third"])
+
+        loan.refresh_from_db()
+        assert loan.flag_reasons == ["First", "Second", "Third"]
+        assert loan.flag_count == 3
+
+    def test_single_flag_changes_resync_summary(self):
+        loan = LoanApplicationFactory()
+        flag = FraudFlagFactory(loan_application=loan, reason="Manual")
+        loan.refresh_from_db()
+        assert loan.flag_reasons == ["Manual"]
+
+        flag.delete()
+        loan.refresh_from_db()
+        assert loan.flag_reasons == []
+        assert loan.flag_count == 0
+
+    @pytest.mark.parametrize('delete_loan', [False, True], ids=['flag', 'cascade'])
+    def test_flag_handlers_load_the_loan_at_most_once(self, delete_loan):
+        loan = LoanApplicationFactory()
+        FraudDetectionService.flag_loan(loan, ["First", "Second"])
+        flags = list(FraudFlag.objects.filter(loan_application=loan))
+
+        with CaptureQueriesContext(connection) as queries:
+            if delete_loan:
+                loan.delete()
+            else:
+                flags[0].delete()
+        loan_reads = [query for query in queries if query['sql'].startswith('SELECT "loans_loanapplication"')]
+        # A lone flag delete reads its loan once plus the summary resync; a cascade reuses the loan
+        assert len(loan_reads) == (0 if delete_loan else 2)
+
+    def test_checker_and_backfill(self, capsys):
+        loan = LoanApplicationFactory()
+        FraudDetectionService.flag_loan(loan, ["Reason"])
+        LoanApplication.objects.filter(pk=loan.pk).update(flag_reasons=[], flag_count=0)
+
+        with pytest.raises(CommandError):
+            call_command('check_flag_summary')
+        assert str(loan.id) in capsys.readouterr().out
+
+        call_command('backfill_flag_summary')
+        call_command('check_flag_summary')
+        loan.refresh_from_db()
+        assert loan.flag_reasons == ["Reason"]
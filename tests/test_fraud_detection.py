@@ -1,8 +1,19 @@
+from smtplib import SMTPException
+from unittest import mock
+
 import pytest
+from django.core.cache import cache
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.management import call_command
 from django.utils import timezone
 from datetime import timedelta
+from apps.loans.fraud_rules import FraudRuleEngine, FraudSubject, HighAmountRule
 from apps.loans.services import FraudDetectionService
-from apps.loans.models import LoanApplication, LoanStatus
+from apps.loans.velocity import LoanVelocityService, loan_velocity
+from apps.loans.models import FraudNotification, LoanApplication, LoanStatus
+from apps.loans.notifications import FraudNotificationService
+from apps.loans.tasks import send_fraud_notification_digest
 from tests.factories import UserFactory, LoanApplicationFactory
 
 
@@ -35,6 +46,58 @@ class TestFraudDetection:
         flags = FraudDetectionService.check_fraud(test_user, 1000000)
         assert "Email domain used by more than 10 users" in flags
 
+    def test_fraud_checks_use_single_query(self, django_assert_num_queries):
+        user = UserFactory()
+        LoanApplicationFactory(user=user)
+
+        with django_assert_num_queries(1):
+            flags = FraudDetectionService.check_fraud(user, 6000000)
+        assert flags == ["Requested amount exceeds NGN 5,000,000"]
+
+    def test_engine_skips_queries_for_rules_without_facts(self, django_assert_num_queries):
+        user = UserFactory()
+        engine = FraudRuleEngine(rules=[HighAmountRule])
+
+        with django_assert_num_queries(0):
+            flags = engine.evaluate(FraudSubject(user, 6000000))
+        assert flags == ["Requested amount exceeds NGN 5,000,000"]
+
+    def test_velocity_counters_fall_back_to_database_without_redis(self):
+        user = UserFactory()
+        for _ in range(3):
+            loan = LoanApplicationFactory(user=user)
+            LoanVelocityService.record(loan, ip_address="127.0.0.1")
+
+        assert loan_velocity.counts("user", user.pk) is None
+        flags = FraudDetectionService.check_fraud(user, 1000)
+        assert "User submitted more than 3 loans in past 24 hours" in flags
+
+    def test_reconcile_velocity_counters_command(self, capsys):
+        LoanApplicationFactory()
+        call_command("reconcile_velocity_counters")
+        assert "Could not rebuild velocity counters for 1 user(s)" in capsys.readouterr().err
+
+    def test_reconcile_velocity_counters_rebuilds_user_sets(self, capsys):
+        user = UserFactory()
+        loans = [LoanApplicationFactory(user=user) for _ in range(2)]
+        old = LoanApplicationFactory(user=user)
+        LoanApplication.objects.filter(pk=old.pk).update(date_applied=timezone.now() - timedelta(days=30))
+        client = mock.MagicMock()
+
+        with mock.patch("apps.common.velocity.get_redis_client", return_value=(cache, client)):
+            call_command("reconcile_velocity_counters", user_pk=user.pk)
+
+        pipe = client.pipeline.return_value
+        key = cache.make_key(f"velocity:loans:user:{user.pk}")
+        pipe.delete.assert_called_once_with(key)
+        members = pipe.zadd.call_args.args[1]
+        # Loans older than the longest window are left out
+        assert set(members) == {str(loan.pkid) for loan in loans}
+        pipe.expire.assert_called_once_with(key, loan_velocity.retention)
+        output = capsys.readouterr()
+        assert "Rebuilt velocity counters for 1 user(s)" in output.out
+        assert not output.err
+
     def test_loan_flagging(self):
         loan = LoanApplicationFactory()
         reasons = ["Test reason"]
@@ -46,6 +109,87 @@ class TestFraudDetection:
         assert loan.fraud_flags.count() == 1
         assert loan.fraud_flags.first().reason == "Test reason"
 
+    def test_flagged_loan_is_mailed_to_each_staff_user(self, django_capture_on_commit_callbacks):
+        admins = [UserFactory(is_staff=True), UserFactory(is_staff=True)]
+        loan = LoanApplicationFactory()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            FraudDetectionService.flag_loan(loan, ["Test reason"])
+
+        assert sorted(message.to[0] for message in mail.outbox) == sorted(admin.email for admin in admins)
+        assert str(loan.id) in mail.outbox[0].subject
+        assert "Test reason" in mail.outbox[0].body
+        assert FraudNotification.objects.pending().count() == 0
+
+    def test_notification_burst_is_sent_as_one_digest(self, settings, django_capture_on_commit_callbacks):
+        settings.FRAUD_NOTIFICATION_IMMEDIATE_LIMIT = 0
+        admin = UserFactory(is_staff=True)
+        loans = LoanApplicationFactory.create_batch(3)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for loan in loans:
+                FraudDetectionService.flag_loan(loan, ["Test reason"])
+        assert mail.outbox == []
+
+        send_fraud_notification_digest()
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == [admin.email]
+        assert all(str(loan.id) in mail.outbox[0].body for loan in loans)
+
+        send_fraud_notification_digest()
+        assert len(mail.outbox) == 1
+
+    def test_digest_batches_share_one_connection(self, settings):
+        settings.FRAUD_NOTIFICATION_BATCH_SIZE = 2
+        UserFactory(is_staff=True)
+        for loan in LoanApplicationFactory.create_batch(5):
+            FraudNotification.objects.create(loan_application=loan, reasons=["Test reason"])
+
+        with mock.patch("apps.loans.notifications.get_connection", wraps=get_connection) as connections:
+            assert FraudNotificationService.send_digest() == 5
+
+        assert connections.call_count == 1
+        assert len(mail.outbox) == 3
+        assert FraudNotification.objects.pending().count() == 0
+
+    def test_failed_digest_batch_is_released(self, settings):
+        settings.FRAUD_NOTIFICATION_BATCH_SIZE = 2
+        UserFactory(is_staff=True)
+        for loan in LoanApplicationFactory.create_batch(3):
+            FraudNotification.objects.create(loan_application=loan, reasons=["Test reason"])
+        send = FraudNotificationService.send
+        attempts = iter([None, SMTPException("unavailable")])
+
+        def flaky_send(*args, **kwargs):
+            error = next(attempts, None)
+            if error is not None:
+                raise error
+            return send(*args, **kwargs)
+
+        with mock.patch.object(FraudNotificationService, "send", side_effect=flaky_send):
+            with pytest.raises(SMTPException):
+                FraudNotificationService.send_digest()
+
+        # The delivered batch stays sent, the failed one goes back to pending
+        assert FraudNotification.objects.pending().count() == 1
+        assert FraudNotificationService.send_digest() == 1
+
+    def test_claims_of_a_dead_sender_expire(self, settings):
+        UserFactory(is_staff=True)
+        for loan in LoanApplicationFactory.create_batch(2):
+            FraudNotification.objects.create(loan_application=loan, reasons=["Test reason"])
+
+        # A worker killed between claiming and sending never marks them sent
+        assert len(FraudNotificationService.claim_batch()) == 2
+        assert FraudNotification.objects.pending().count() == 2
+        assert FraudNotificationService.send_digest() == 0
+
+        FraudNotification.objects.update(
+            claimed_at=timezone.now() - timedelta(seconds=settings.FRAUD_NOTIFICATION_CLAIM_TIMEOUT + 1)
+        )
+        assert FraudNotificationService.send_digest() == 2
+        assert FraudNotification.objects.pending().count() == 0
+
     # @pytest.mark.parametrize("reasons", [
     #     ["Test reason 1", "Test reason 2"],
     #     ["Another reason"],
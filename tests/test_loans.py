@@ -1,8 +1,22 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.loans.caching import invalidate_loan_lists
 from apps.loans.models import LoanApplication, LoanStatus
-from tests.factories import UserFactory, LoanApplicationFactory
+from apps.loans.services import FraudDetectionService
+from tests.factories import UserFactory, LoanApplicationFactory, FraudFlagFactory
 
 
 @pytest.mark.django_db
@@ -83,4 +97,463 @@ class TestLoanApplication:
         loan = LoanApplication.objects.get(id=response.data['id'])
         assert loan.status == LoanStatus.FLAGGED
         assert loan.fraud_flags.count() > 0
-        assert "Requested amount exceeds NGN 5,000,000" in loan.fraud_flags.first().reason 
+        assert "Requested amount exceeds NGN 5,000,000" in loan.fraud_flags.first().reason
+        assert loan.fraud_checked_at is not None
+
+    def test_loan_is_marked_checked_only_after_fraud_rules_run(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        checked_before_rules = []
+
+        def check_fraud(user, amount):
+            checked_before_rules.append(LoanApplication.objects.get(user=user).fraud_checked_at)
+            return []
+
+        with mock.patch.object(FraudDetectionService, 'check_fraud', side_effect=check_fraud):
+            response = api_client.post(
+                reverse('loans:loan-applications-list'), {'amount_requested': 1000, 'purpose': 'Checked'}
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert checked_before_rules == [None]
+        assert LoanApplication.objects.get(id=response.data['id']).fraud_checked_at is not None
+
+    def test_idempotent_loan_submission(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-list')
+        data = {'amount_requested': 1000000, 'purpose': 'Business expansion'}
+
+        first = api_client.post(url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        replay = api_client.post(url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert replay.status_code == status.HTTP_200_OK
+        assert replay.data['id'] == first.data['id']
+        assert LoanApplication.objects.filter(user=regular_user).count() == 1
+
+    def test_idempotency_key_longer_than_column_is_rejected(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-list')
+        data = {'amount_requested': 1000000, 'purpose': 'Business expansion'}
+
+        response = api_client.post(url, data, HTTP_IDEMPOTENCY_KEY='k' * 256)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Idempotency-Key' in response.data
+        assert not LoanApplication.objects.filter(user=regular_user).exists()
+
+    def test_async_fraud_check(self, api_client, regular_user, settings, django_capture_on_commit_callbacks):
+        settings.FRAUD_CHECK_ASYNC = True
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-list')
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            response = api_client.post(url, {'amount_requested': 6000000, 'purpose': 'High value loan'})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == LoanStatus.PENDING
+        # The queued fraud check, then the admin notification once the flag commits
+        assert len(callbacks) == 2
+        assert len(mail.outbox) == 1
+
+        loan = LoanApplication.objects.get(id=response.data['id'])
+        assert loan.status == LoanStatus.FLAGGED
+        assert loan.fraud_checked_at is not None
+
+    def test_loan_status_endpoint_returns_flag_objects(self, api_client, regular_user):
+        loan = LoanApplicationFactory(user=regular_user)
+        FraudDetectionService.flag_loan(loan, ['First reason', 'Second reason'])
+        api_client.force_authenticate(user=regular_user)
+
+        response = api_client.get(reverse('loans:loan-applications-check-status', kwargs={'pk': loan.pk}))
+
+        assert response.data['fraud_flags'] == [{'reason': 'First reason'}, {'reason': 'Second reason'}]
+
+    def test_loan_status_endpoint_supports_etag(self, api_client, regular_user):
+        loan = LoanApplicationFactory(user=regular_user)
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-check-status', kwargs={'pk': loan.pk})
+
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['fraud_check'] == 'pending'
+        assert response.data['fraud_flags'] == []
+
+        cached = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+    @pytest.mark.parametrize('url_name', ['loans:loan-applications-list', 'loans:flagged-loans'])
+    def test_list_supports_conditional_get(self, api_client, admin_user, url_name, locmem_cache):
+        loan = LoanApplicationFactory(status=LoanStatus.FLAGGED)
+        api_client.force_authenticate(user=admin_user)
+        url = reverse(url_name)
+
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        # Deletes move no timestamp, so listings are validated by ETag only
+        assert not response.has_header('Last-Modified')
+
+        not_modified = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified['ETag'] == response['ETag']
+
+        LoanApplicationFactory(status=LoanStatus.FLAGGED)
+        changed = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed['ETag'] != response['ETag']
+
+        loan.delete()
+        deleted = api_client.get(url, HTTP_IF_NONE_MATCH=changed['ETag'])
+        assert deleted.status_code == status.HTTP_200_OK
+        assert deleted['ETag'] != changed['ETag']
+
+    @pytest.mark.parametrize('pagination', ['page', 'cursor'])
+    def test_cached_list_runs_no_queries(self, api_client, admin_user, locmem_cache, pagination):
+        LoanApplicationFactory()
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('loans:loan-applications-list')
+        api_client.get(url, {'pagination': pagination})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, {'pagination': pagination})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) == 0
+
+    def test_flagged_list_etag_changes_when_a_loan_leaves_it(self, api_client, admin_user, locmem_cache):
+        loans = [LoanApplicationFactory(status=LoanStatus.FLAGGED) for _ in range(2)]
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('loans:flagged-loans')
+        etag = api_client.get(url)['ETag']
+
+        api_client.post(reverse('loans:loan-applications-approve', kwargs={'pk': loans[0].pk}))
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+
+    def test_flag_changes_touch_the_loan(self, api_client, regular_user, locmem_cache):
+        loan = LoanApplicationFactory(user=regular_user)
+        api_client.force_authenticate(user=regular_user)
+        detail_url = reverse('loans:loan-applications-detail', kwargs={'pk': loan.pk})
+        etag = api_client.get(detail_url)['ETag']
+
+        flag = FraudFlagFactory(loan_application=loan, reason='Manual review')
+        loan.refresh_from_db()
+        assert loan.flag_reasons == ['Manual review']
+        assert api_client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+        etag = api_client.get(detail_url)['ETag']
+        flag.delete()
+        assert api_client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_list_etag_changes_with_query_params(self, api_client, regular_user):
+        LoanApplicationFactory(user=regular_user)
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-list')
+
+        etag = api_client.get(url)['ETag']
+        response = api_client.get(url, {'status': LoanStatus.PENDING}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_loan_detail_supports_conditional_get(self, api_client, regular_user):
+        loan = LoanApplicationFactory(user=regular_user)
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-detail', kwargs={'pk': loan.pk})
+
+        etag = api_client.get(url)['ETag']
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        loan.purpose = 'Updated purpose'
+        loan.save()
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_velocity_counters_use_the_proxied_client_ip(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        proxy = {'REMOTE_ADDR': '10.0.0.2', 'HTTP_X_FORWARDED_FOR': '203.0.113.7'}
+
+        with mock.patch('apps.loans.views.LoanVelocityService.record') as record:
+            api_client.post(
+                reverse('loans:loan-applications-list'), {'amount_requested': 1000, 'purpose': 'One'}, **proxy
+            )
+        with mock.patch('apps.loans.services.LoanVelocityService.record_many') as record_many:
+            api_client.post(
+                reverse('loans:loan-applications-bulk'),
+                [{'amount_requested': 1000, 'purpose': 'Two'}],
+                format='json',
+                **proxy,
+            )
+        assert record.call_args.kwargs['ip_address'] == '203.0.113.7'
+        assert record_many.call_args.kwargs['ip_address'] == '203.0.113.7'
+
+    def test_bulk_loan_submission(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-bulk')
+        data = [
+            {'amount_requested': 1000, 'purpose': 'First'},
+            {'amount_requested': 6000000, 'purpose': 'Second'},
+            {'amount_requested': 1000, 'purpose': 'Third'},
+        ]
+
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['count'] == 3
+        assert response.data['flagged'] == 2
+        statuses = [row['status'] for row in response.data['results']]
+        assert statuses == [LoanStatus.PENDING, LoanStatus.FLAGGED, LoanStatus.FLAGGED]
+        assert response.data['results'][2]['fraud_flags'] == [
+            {'reason': 'User submitted more than 3 loans in past 24 hours'}
+        ]
+        assert LoanApplication.objects.filter(user=regular_user).count() == 3
+
+    def test_bulk_submission_query_count_is_constant(self, api_client):
+        url = reverse('loans:loan-applications-bulk')
+
+        query_counts = []
+        for size in (3, 5, 50):
+            api_client.force_authenticate(user=UserFactory())
+            data = [{'amount_requested': 6000000, 'purpose': f'Loan {i}'} for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = api_client.post(url, data, format='json')
+            assert response.status_code == status.HTTP_201_CREATED
+            query_counts.append(len(queries))
+
+        # The first batch creates the daily stats rows the later ones update
+        assert query_counts[1] == query_counts[2]
+
+    def test_bulk_submission_rejects_invalid_payload(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('loans:loan-applications-bulk')
+
+        response = api_client.post(url, [{'amount_requested': 'abc', 'purpose': 'x'}], format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_cursor_pagination_walks_all_pages(self, api_client, admin_user):
+        loans = [LoanApplicationFactory(amount_requested=1000 + (i % 3)) for i in range(7)]
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('loans:loan-applications-list')
+
+        seen = []
+        response = api_client.get(url, {'pagination': 'cursor', 'page_size': 3, 'ordering': 'amount_requested'})
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.data
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                break
+            response = api_client.get(response.data['next'])
+
+        expected = sorted(loans, key=lambda loan: (loan.amount_requested, loan.pkid))
+        assert seen == [str(loan.id) for loan in expected]
+
+        previous = api_client.get(response.data['previous'])
+        assert [row['id'] for row in previous.data['results']] == seen[3:6]
+
+    def test_cursor_pagination_rejects_tampered_cursor(self, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('loans:loan-applications-list')
+
+        response = api_client.get(url, {'cursor': 'not-a-cursor'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_streaming_export_joins_fraud_flags(self, api_client, admin_user):
+        flagged = LoanApplicationFactory(status=LoanStatus.FLAGGED)
+        FraudFlagFactory(loan_application=flagged, reason='First reason')
+        FraudFlagFactory(loan_application=flagged, reason='Second reason')
+        LoanApplicationFactory(status=LoanStatus.PENDING)
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('loans:loan-export')
+
+        response = api_client.get(url, {'export_format': 'ndjson', 'status': 'flagged'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert len(rows) == 1
+        assert rows[0]['id'] == str(flagged.id)
+        assert rows[0]['fraud_flags'] == ['First reason', 'Second reason']
+
+        csv_response = api_client.get(url)
+        rows = list(csv.reader(io.StringIO(b''.join(csv_response.streaming_content).decode())))
+        assert rows[0][:3] == ['id', 'user_email', 'amount_requested']
+        assert len(rows) == 3
+
+    @pytest.mark.parametrize('value', ['2024-02-30', '2024-02-30T10:00:00', 'yesterday'])
+    def test_export_rejects_invalid_dates(self, api_client, admin_user, value):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('loans:loan-export'), {'date_from': value})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'date_from' in response.data
+
+    def test_export_is_staff_only(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        response = api_client.get(reverse('loans:loan-export'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.parametrize('url_name', ['loans:loan-applications-list', 'loans:flagged-loans'])
+    def test_list_query_count_is_constant(self, api_client, admin_user, url_name):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse(url_name)
+
+        query_counts = []
+        for size in (2, 20):
+            for _ in range(size):
+                loan = LoanApplicationFactory(status=LoanStatus.FLAGGED)
+                FraudFlagFactory(loan_application=loan)
+            with CaptureQueriesContext(connection) as queries:
+                response = api_client.get(url, {'page_size': 50})
+            assert response.status_code == status.HTTP_200_OK
+            assert response.data['results'][0]['user_email']
+            query_counts.append(len(queries))
+
+        assert query_counts[0] == query_counts[1]
+
+    @pytest.mark.parametrize('url_name', ['loans:loan-applications-list', 'loans:flagged-loans'])
+    @pytest.mark.parametrize('pagination', ['page', 'cursor'])
+    def test_fast_list_serializer_matches_model_serializer(
+        self, api_client, admin_user, settings, url_name, pagination
+    ):
+        api_client.force_authenticate(user=admin_user)
+        for amount in ('1000.5', '2500000.00', '0.01'):
+            loan = LoanApplicationFactory(
+                status=LoanStatus.FLAGGED, amount_requested=Decimal(amount), purpose='Café – ✓'
+            )
+            FraudFlagFactory(loan_application=loan)
+        LoanApplicationFactory(status=LoanStatus.FLAGGED)
+
+        bodies = []
+        for fast in (True, False):
+            settings.LOAN_FAST_LIST_SERIALIZER = fast
+            response = api_client.get(reverse(url_name), {'pagination': pagination, 'page_size': 2})
+            assert response.status_code == status.HTTP_200_OK
+            bodies.append(response.content)
+            # Both passes must render, not replay the cached first response
+            invalidate_loan_lists()
+
+        assert bodies[0] == bodies[1]
+
+
+@pytest.mark.django_db
+class TestAsyncLoanViews:
+    @staticmethod
+    def authenticate(api_client, user):
+        # The async views run their own JWT authentication, so force_authenticate does not apply
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def test_async_list_matches_sync_list(self, api_client, regular_user):
+        self.authenticate(api_client, regular_user)
+        for amount in ('1000.5', '2500000.00', '0.01'):
+            LoanApplicationFactory(user=regular_user, amount_requested=Decimal(amount), purpose='Café – ✓')
+        LoanApplicationFactory()
+        params = {'page_size': 2, 'ordering': 'amount_requested', 'pagination': 'page'}
+
+        sync = api_client.get(reverse('loans:loan-applications-list'), params)
+        response = api_client.get(reverse('loans:async-loan-applications-list'), params)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/json'
+        body, expected = json.loads(response.content), json.loads(sync.content)
+        assert body['count'] == expected['count'] == 3
+        assert body['results'] == expected['results']
+        assert body['previous'] is None
+        assert '/async/applications/' in body['next'] and 'page=2' in body['next']
+
+    def test_async_list_walks_cursor_pages_like_sync_list(self, api_client, regular_user, settings):
+        settings.LOAN_PAGINATION_MODE = 'cursor'
+        self.authenticate(api_client, regular_user)
+        for i in range(5):
+            LoanApplicationFactory(user=regular_user, amount_requested=1000 + (i % 2))
+        params = {'page_size': 2, 'ordering': 'amount_requested'}
+
+        pages = []
+        for url_name in ('loans:loan-applications-list', 'loans:async-loan-applications-list'):
+            bodies = [json.loads(api_client.get(reverse(url_name), params).content)]
+            while bodies[-1]['next']:
+                response = api_client.get(bodies[-1]['next'])
+                assert response.status_code == status.HTTP_200_OK
+                bodies.append(json.loads(response.content))
+            pages.append(bodies)
+
+        sync, async_ = pages
+        assert [body['results'] for body in async_] == [body['results'] for body in sync]
+        assert all('count' not in body for body in async_)
+        assert async_[-1]['previous'] and '/async/applications/' in async_[-1]['previous']
+        tampered = api_client.get(reverse('loans:async-loan-applications-list'), {'cursor': 'bogus'})
+        assert tampered.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_async_list_filters_and_validates(self, api_client, regular_user):
+        self.authenticate(api_client, regular_user)
+        LoanApplicationFactory(user=regular_user, status=LoanStatus.APPROVED)
+        LoanApplicationFactory(user=regular_user, status=LoanStatus.PENDING)
+        url = reverse('loans:async-loan-applications-list')
+
+        response = api_client.get(url, {'status': LoanStatus.APPROVED})
+        assert [loan['status'] for loan in json.loads(response.content)['results']] == [LoanStatus.APPROVED]
+        assert api_client.get(url, {'status': 'bogus'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.get(url, {'page': 5}).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_async_views_require_authentication(self, api_client):
+        response = api_client.get(reverse('loans:async-loan-applications-list'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'].startswith('Bearer')
+
+        api_client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        assert api_client.get(reverse('loans:async-flagged-loans')).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_async_flagged_loans_is_staff_only(self, api_client, regular_user, admin_user):
+        flagged = LoanApplicationFactory(status=LoanStatus.FLAGGED)
+        LoanApplicationFactory(status=LoanStatus.PENDING)
+        url = reverse('loans:async-flagged-loans')
+
+        self.authenticate(api_client, regular_user)
+        assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+        self.authenticate(api_client, admin_user)
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert [loan['id'] for loan in json.loads(response.content)['results']] == [str(flagged.id)]
+
+    def test_async_detail_hides_other_users_loans(self, api_client, regular_user):
+        own = LoanApplicationFactory(user=regular_user)
+        other = LoanApplicationFactory()
+        self.authenticate(api_client, regular_user)
+
+        response = api_client.get(reverse('loans:async-loan-applications-detail', kwargs={'pk': own.pk}))
+        assert response.status_code == status.HTTP_200_OK
+        sync = api_client.get(reverse('loans:loan-applications-detail', kwargs={'pk': own.pk}))
+        assert json.loads(response.content)['amount_requested'] == sync.data['amount_requested']
+        assert json.loads(response.content)['user_email'] == regular_user.email
+
+        response = api_client.get(reverse('loans:async-loan-applications-detail', kwargs={'pk': other.pk}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_export_streams_asynchronously_under_asgi(self, admin_user, settings):
+        settings.LOAN_EXPORT_CHUNK_SIZE = 2
+        loans = LoanApplicationFactory.create_batch(3)
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(admin_user)}'}
+
+        async def export():
+            response = await AsyncClient().get(
+                reverse('loans:loan-export'), {'export_format': 'ndjson'}, headers=headers
+            )
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(export)()
+        assert response.status_code == status.HTTP_200_OK
+        assert response.is_async
+        # Pulled a chunk of lines at a time rather than buffered whole
+        assert len(chunks) == 2
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        assert {row['id'] for row in rows} == {str(loan.id) for loan in loans}
+
+    def test_async_views_support_etag(self, api_client, regular_user, locmem_cache):
+        loan = LoanApplicationFactory(user=regular_user)
+        self.authenticate(api_client, regular_user)
+
+        for url in (
+            reverse('loans:async-loan-applications-list'),
+            reverse('loans:async-loan-applications-detail', kwargs={'pk': loan.pk}),
+        ):
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            not_modified = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from apps.common import outbox
+from apps.common.models import TaskOutboxMessage
+from apps.common.outbox import TaskOutbox
+from apps.common.tasks import relay_task_outbox
+from apps.loans.tasks import run_fraud_checks
+from tests.factories import LoanApplicationFactory
+
+
+@pytest.mark.django_db
+class TestTaskOutbox:
+    def test_message_is_published_after_commit(self, django_capture_on_commit_callbacks):
+        loan = LoanApplicationFactory(amount_requested=1000)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            message = TaskOutbox.enqueue(run_fraud_checks, str(loan.id))
+            assert TaskOutboxMessage.objects.pending().count() == 1
+
+        message.refresh_from_db()
+        loan.refresh_from_db()
+        assert message.published_at is not None
+        assert loan.fraud_checked_at is not None
+
+    def test_rolled_back_message_is_never_published(self, django_capture_on_commit_callbacks):
+        loan = LoanApplicationFactory()
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    TaskOutbox.enqueue(run_fraud_checks, str(loan.id))
+                    raise RuntimeError("rollback")
+
+        assert callbacks == []
+        assert not TaskOutboxMessage.objects.exists()
+
+    def test_relay_publishes_what_the_fast_path_missed(self, monkeypatch, django_capture_on_commit_callbacks):
+        monkeypatch.setattr(outbox, "_fast_path_paused_until", 0.0)
+        loan = LoanApplicationFactory(amount_requested=1000)
+
+        with mock.patch.object(run_fraud_checks, "apply_async", side_effect=OperationalError("broker down")):
+            with django_capture_on_commit_callbacks(execute=True):
+                message = TaskOutbox.enqueue(run_fraud_checks, str(loan.id))
+        message.refresh_from_db()
+        assert message.published_at is None
+        assert message.attempts == 1
+        assert message.last_error == "broker down"
+
+        relay_task_outbox()
+        message.refresh_from_db()
+        loan.refresh_from_db()
+        assert message.published_at is not None
+        assert loan.fraud_checked_at is not None
+
+    def test_relay_purges_old_published_messages(self, settings):
+        old = TaskOutboxMessage.objects.create(
+            task_name=run_fraud_checks.name,
+            published_at=timezone.now() - timedelta(seconds=settings.TASK_OUTBOX_RETENTION + 60),
+        )
+        recent = TaskOutboxMessage.objects.create(task_name=run_fraud_checks.name, published_at=timezone.now())
+
+        relay_task_outbox()
+        assert not TaskOutboxMessage.objects.filter(pkid=old.pkid).exists()
+        assert TaskOutboxMessage.objects.filter(pkid=recent.pkid).exists()
@@ -0,0 +1,87 @@
+import gzip
+import io
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.common import parsers, renderers
+from apps.common.parsers import FastJSONParser
+from apps.common.renderers import FastJSONRenderer
+from apps.loans.models import LoanStatus
+from tests.factories import LoanApplicationFactory
+
+PAYLOAD = {
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "amount": Decimal("1250000.50"),
+    "label": gettext_lazy("Loan"),
+    "applied": datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+    "day": date(2025, 1, 2),
+    "elapsed": timedelta(minutes=5),
+    "purpose": "Café   ✓",
+    "flags": ({"reason": "High loan amount"},),
+    1: None,
+}
+
+
+class TestFastJSONRenderer:
+    def test_output_matches_stdlib_renderer(self):
+        assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_indented_output_uses_stdlib_renderer(self):
+        media_type = "application/json; indent=4"
+        assert FastJSONRenderer().render(PAYLOAD, media_type) == JSONRenderer().render(PAYLOAD, media_type)
+
+    def test_falls_back_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, "orjson", None)
+        assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_unsupported_values_fall_back(self):
+        data = {"big": 2 ** 70}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+class TestFastJSONParser:
+    def test_parses_like_stdlib_parser(self):
+        body = json.dumps({"amount_requested": 1000, "purpose": "Café"}).encode()
+        assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+    @pytest.mark.parametrize("body", [b"{", b'{"amount": NaN}'])
+    def test_invalid_json_raises_parse_error(self, body):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(body))
+
+    def test_falls_back_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(parsers, "orjson", None)
+        assert FastJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')) == {"a": [1, 2]}
+
+
+@pytest.mark.django_db
+class TestResponseCompression:
+    def test_large_response_is_gzipped(self, api_client, admin_user):
+        for _ in range(10):
+            LoanApplicationFactory(status=LoanStatus.FLAGGED)
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get(reverse("loans:flagged-loans"), HTTP_ACCEPT_ENCODING="gzip, deflate")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert len(json.loads(gzip.decompress(response.content))["results"]) == 10
+
+    def test_small_response_is_not_compressed(self, api_client, admin_user, settings):
+        settings.RESPONSE_COMPRESSION_MIN_SIZE = 10_000
+        LoanApplicationFactory(status=LoanStatus.FLAGGED)
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get(reverse("loans:flagged-loans"), HTTP_ACCEPT_ENCODING="gzip")
+        assert not response.has_header("Content-Encoding")
+        assert len(response.json()["results"]) == 1
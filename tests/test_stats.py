@@ -0,0 +1,87 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from apps.common.cache import get_generations
+from apps.loans.models import LoanApplication, LoanDailyStats, LoanStatus
+from apps.loans.services import FraudDetectionService
+from apps.loans.stats import STATS_SCOPE
+from tests.factories import LoanApplicationFactory
+
+
+def snapshot():
+    return {
+        (row.day, row.status, row.flag_reason): (row.loan_count, row.amount_total)
+        for row in LoanDailyStats.objects.all()
+        if row.loan_count
+    }
+
+
+@pytest.mark.django_db
+class TestLoanDailyStats:
+    def test_incremental_rollup_matches_rebuild(self, rf, admin_user):
+        loans = [LoanApplicationFactory(amount_requested=1000) for _ in range(3)]
+        FraudDetectionService.flag_loan(loans[0], ["Too many loans", "Shared domain"])
+        loans[1].status = LoanStatus.APPROVED
+        loans[1].save()
+        loans[2].delete()
+
+        admin = site._registry[LoanApplication]
+        admin.reject_loans(rf.post('/'), LoanApplication.objects.filter(pk=loans[0].pk))
+
+        incremental = snapshot()
+        call_command('rebuild_loan_stats')
+        assert snapshot() == incremental
+
+        rejected = [key for key in incremental if key[1] == LoanStatus.REJECTED]
+        assert {key[2] for key in rejected} == {'', 'Too many loans', 'Shared domain'}
+        assert LoanStatus.PENDING not in {key[1] for key in incremental}
+
+    def test_migration_seeds_existing_loans(self):
+        loans = [LoanApplicationFactory(amount_requested=1000) for _ in range(2)]
+        FraudDetectionService.flag_loan(loans[0], ["Too many loans"])
+        expected = snapshot()
+        LoanDailyStats.objects.all().delete()
+
+        import_module('apps.loans.migrations.0004_loan_daily_stats').seed_loan_daily_stats(apps, None)
+        assert snapshot() == expected
+
+        # Later deltas apply on top of the seeded rows
+        loans[1].status = LoanStatus.APPROVED
+        loans[1].save()
+        assert all(count >= 0 for count, _ in snapshot().values())
+
+    def test_stats_cache_is_invalidated_only_when_buckets_change(self, locmem_cache):
+        loan = LoanApplicationFactory()
+        generation = get_generations(STATS_SCOPE)
+        LoanApplicationFactory()
+        assert get_generations(STATS_SCOPE) == generation
+
+        loan.status = LoanStatus.APPROVED
+        loan.save()
+        assert get_generations(STATS_SCOPE) != generation
+
+    def test_stats_endpoint(self, api_client, admin_user):
+        LoanApplicationFactory(amount_requested=1000)
+        LoanApplicationFactory(amount_requested=500)
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get(reverse('loans:loan-stats'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['totals'][LoanStatus.PENDING] == {'loan_count': 2, 'amount_total': '1500.00'}
+        assert len(response.data['days']) == 1
+
+    @pytest.mark.parametrize('value', ['2024-02-30', 'soon'])
+    def test_stats_endpoint_rejects_invalid_dates(self, api_client, admin_user, value):
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get(reverse('loans:loan-stats'), {'date_from': value})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'date_from' in response.data
@@ -1,8 +1,14 @@
+from unittest import mock
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
+from apps.users.models import DomainUsage
+
 User = get_user_model()
 
 
@@ -24,6 +30,95 @@ class TestUserManagement:
         assert response.status_code == status.HTTP_200_OK
         assert 'access' in response.data
 
+    def test_failed_logins_lock_account_without_intermediate_writes(self, api_client, regular_user, locmem_cache):
+        url = reverse('usersauth:jwt-create')
+        data = {'email': regular_user.email, 'password': 'wrong'}
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                assert api_client.post(url, data).status_code == status.HTTP_401_UNAUTHORIZED
+            assert not any(query['sql'].startswith('UPDATE') for query in queries.captured_queries)
+
+        assert api_client.post(url, data).status_code == status.HTTP_401_UNAUTHORIZED
+        regular_user.refresh_from_db()
+        assert regular_user.is_locked
+        assert regular_user.failed_login_attempts == 3
+
+        response = api_client.post(url, {'email': regular_user.email, 'password': 'regularpass123'})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_successful_login_does_not_write_user(self, api_client, regular_user, locmem_cache):
+        url = reverse('usersauth:jwt-create')
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(url, {'email': regular_user.email, 'password': 'regularpass123'})
+        assert response.status_code == status.HTTP_200_OK
+        assert not any(query['sql'].startswith('UPDATE') for query in queries.captured_queries)
+
+    def test_login_rehashes_password_when_cost_settings_change(self, api_client, regular_user, settings):
+        settings.ARGON2_TIME_COST += 1
+        url = reverse('usersauth:jwt-create')
+        response = api_client.post(url, {'email': regular_user.email, 'password': 'regularpass123'})
+        assert response.status_code == status.HTTP_200_OK
+
+        regular_user.refresh_from_db()
+        assert f't={settings.ARGON2_TIME_COST},' in regular_user.password
+        assert regular_user.check_password('regularpass123')
+
+    def test_locked_and_inactive_accounts_are_rejected_before_hashing(self, api_client, user_factory):
+        locked = user_factory(username='locked', email='locked@example.com', is_locked=True)
+        inactive = user_factory(username='inactive', email='inactive@example.com', is_active=False)
+        url = reverse('usersauth:jwt-create')
+        with mock.patch.object(User, 'check_password') as check_password:
+            locked_response = api_client.post(url, {'email': locked.email, 'password': 'testpass123'})
+            inactive_response = api_client.post(url, {'email': inactive.email, 'password': 'testpass123'})
+        assert locked_response.status_code == status.HTTP_403_FORBIDDEN
+        assert inactive_response.status_code == status.HTTP_401_UNAUTHORIZED
+        check_password.assert_not_called()
+
+    def test_failed_logins_are_rate_limited_per_ip(self, api_client, regular_user, locmem_cache, settings):
+        settings.LOGIN_IP_MAX_FAILURES = 2
+        url = reverse('usersauth:jwt-create')
+        api_client.post(url, {'email': 'nobody@example.com', 'password': 'wrong'})
+        api_client.post(url, {'email': 'someone@example.com', 'password': 'wrong'})
+
+        response = api_client.post(url, {'email': regular_user.email, 'password': 'regularpass123'})
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == str(settings.LOGIN_FAILURE_WINDOW)
+
+    def test_clients_behind_one_proxy_are_rate_limited_separately(
+        self, api_client, regular_user, locmem_cache, settings
+    ):
+        settings.LOGIN_IP_MAX_FAILURES = 2
+        url = reverse('usersauth:jwt-create')
+        proxy = {'REMOTE_ADDR': '10.0.0.2'}
+        attacker = {**proxy, 'HTTP_X_FORWARDED_FOR': '203.0.113.7'}
+        api_client.post(url, {'email': 'nobody@example.com', 'password': 'wrong'}, **attacker)
+        api_client.post(url, {'email': 'someone@example.com', 'password': 'wrong'}, **attacker)
+
+        blocked = api_client.post(url, {'email': regular_user.email, 'password': 'regularpass123'}, **attacker)
+        allowed = api_client.post(
+            url,
+            {'email': regular_user.email, 'password': 'regularpass123'},
+            HTTP_X_FORWARDED_FOR='198.51.100.4',
+            **proxy,
+        )
+        assert blocked.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert allowed.status_code == status.HTTP_200_OK
+
+    def test_unlock_resets_failure_counters(self, regular_user, locmem_cache):
+        from django.contrib.admin.sites import site
+        from apps.users.lockout import LoginThrottleService
+
+        LoginThrottleService.record_failure(regular_user.email)
+        regular_user.is_locked = True
+        regular_user.save(update_fields=['is_locked'])
+
+        user_admin = site._registry[User]
+        with mock.patch.object(user_admin, 'message_user'):
+            user_admin.unlock_accounts(None, User.objects.filter(pk=regular_user.pk))
+        regular_user.refresh_from_db()
+        assert not regular_user.is_locked
+        assert LoginThrottleService.failures(regular_user.email) == 0
+
     def test_user_profile_access(self, api_client, regular_user):
         api_client.force_authenticate(user=regular_user)
         url = reverse('usersapi:users-me')
@@ -39,6 +134,135 @@ class TestUserManagement:
         assert isinstance(response.data.get("results", None), list)
         assert len(response.data) > 0
     
+    def test_users_list_supports_conditional_get(self, api_client, admin_user, user_factory, locmem_cache):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('usersapi:users-list')
+
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert not response.has_header('Last-Modified')
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == status.HTTP_304_NOT_MODIFIED
+
+        user_factory()
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == status.HTTP_200_OK
+
+    def test_user_detail_supports_conditional_get(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        url = reverse('usersapi:users-me')
+
+        etag = api_client.get(url)['ETag']
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        regular_user.city = 'Lagos'
+        regular_user.save(update_fields=['city'])
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_cached_user_detail_costs_no_queries(self, api_client, admin_user, regular_user, locmem_cache):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('usersapi:users-detail', kwargs={'id': regular_user.id})
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['email'] == regular_user.email
+        assert len(queries) == 0
+
+    def test_cached_user_detail_still_checks_permissions(self, api_client, admin_user, regular_user, locmem_cache):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('usersapi:users-detail', kwargs={'id': admin_user.id})
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user=regular_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert len(queries) == 0
+
+    def test_user_detail_cache_is_invalidated_on_delete(self, api_client, admin_user, user_factory, locmem_cache):
+        user = user_factory(username='leaving', email='leaving@example.com')
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('usersapi:users-detail', kwargs={'id': user.id})
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        user.delete()
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_repeat_jwt_requests_skip_token_decoding_and_user_query(self, api_client, regular_user, locmem_cache):
+        from rest_framework_simplejwt.backends import TokenBackend
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(regular_user)}')
+        url = reverse('loans:loan-applications-list')
+        with mock.patch.object(TokenBackend, 'decode', side_effect=TokenBackend.decode, autospec=True) as decode:
+            assert api_client.get(url).status_code == status.HTTP_200_OK
+            with CaptureQueriesContext(connection) as queries:
+                assert api_client.get(url).status_code == status.HTTP_200_OK
+        assert decode.call_count == 1
+        assert not any('"users_user"' in query['sql'] for query in queries.captured_queries)
+
+    def test_cached_jwt_user_is_invalidated_on_deactivation(self, api_client, regular_user, locmem_cache):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(regular_user)}')
+        url = reverse('loans:loan-applications-list')
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        regular_user.is_active = False
+        regular_user.save(update_fields=['is_active'])
+        assert api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_me_with_jwt_loads_full_user_and_updates_etag(self, api_client, regular_user, locmem_cache):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(regular_user)}')
+        url = reverse('usersapi:users-me')
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        # The slim auth row, then one full row for the serializer; no lazy per-field loads
+        assert len([query for query in queries.captured_queries if '"users_user"' in query['sql']]) == 2
+
+        patched = api_client.patch(url, {'city': 'Lagos'})
+        assert patched.status_code == status.HTTP_200_OK
+
+        changed = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed.data['city'] == 'Lagos'
+        assert changed['ETag'] != response['ETag']
+
+    def test_saving_partly_loaded_user_bumps_updated_at(self, regular_user):
+        user = User.objects.only('pkid', 'email', 'first_name').get(pk=regular_user.pk)
+        user.first_name = 'Partial'
+        user.save()
+
+        refreshed = User.objects.get(pk=regular_user.pk)
+        assert refreshed.first_name == 'Partial'
+        assert refreshed.updated_at > regular_user.updated_at
+
+    def test_email_domain_is_normalized(self, user_factory):
+        user = user_factory(email='someone@Example.COM')
+        assert user.email_domain == 'example.com'
+
+    def test_domain_usage_tracks_active_users(self, user_factory):
+        first = user_factory(username='first', email='first@corp.com')
+        second = user_factory(username='second', email='second@corp.com')
+        assert DomainUsage.objects.get(domain='corp.com').active_users == 2
+
+        first.is_active = False
+        first.save(update_fields=['is_active'])
+        assert DomainUsage.objects.get(domain='corp.com').active_users == 1
+
+        first.is_active = True
+        first.save()
+        second.delete()
+        assert DomainUsage.objects.get(domain='corp.com').active_users == 1
+
+        first.email = 'first@other.com'
+        first.save()
+        assert DomainUsage.objects.get(domain='corp.com').active_users == 0
+        assert DomainUsage.objects.get(domain='other.com').active_users == 1
+
     # def test_user_profile_update(self, api_client, regular_user):
     #     api_client.force_authenticate(user=regular_user)
     #     url = reverse('usersapi:users-me')